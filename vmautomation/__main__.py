@@ -1,13 +1,13 @@
 #!/usr/bin/env python
 
-import __about__
 import argparse
 import getpass
+import importlib
 import logging
-import json
-from virtual_machine import VirtualMachine
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 import os
+import sys
 
 
 class ValueRequired(Exception):
@@ -16,7 +16,7 @@ class ValueRequired(Exception):
     """
 
     def __init__(self, msg="Value required from json"):
-        super(ValueRequired, self).__init__(msg)
+        super().__init__(msg)
 
 
 class InvalidConfigurationFromJson(Exception):
@@ -25,7 +25,7 @@ class InvalidConfigurationFromJson(Exception):
     """
 
     def __init__(self, msg="Invalid Configuration from json"):
-        super(InvalidConfigurationFromJson, self).__init__(msg)
+        super().__init__(msg)
 
 
 class JSONFileNotFound(Exception):
@@ -34,90 +34,234 @@ class JSONFileNotFound(Exception):
     """
 
     def __init__(self, msg="Json File Not Found"):
-        super(JSONFileNotFound, self).__init__(msg)
+        super().__init__(msg)
+
+
+# Global options which consume the following command-line token as their value
+__OPTIONS_WITH_VALUE = ('--host', '--port', '--username', '--password', '-l', '--log-file')
+# Every global long option, to resolve the prefix abbreviations argparse accepts
+__GLOBAL_LONG_OPTIONS = ('--host', '--port', '--username', '--password', '--disable-SSL-certificate-verification',
+                         '--debug', '--log-file', '--version', '--help')
+# Help shared by command arguments
+__HELP_JSON_FILE = 'Json file containing all VM data'
+__HELP_VM_NAME = 'VM name'
+
+
+def __add_create_arguments(create_parser):
+    """
+    To add arguments of create command
+    Args:
+        create_parser  (obj): argparse parser of create command
+    """
+    create_parser.add_argument('--json-file', required=True, help=__HELP_JSON_FILE,
+                               dest='json_file', type=str)
+
+
+def __add_delete_arguments(delete_parser):
+    """
+    To add arguments of delete command
+    Args:
+        delete_parser  (obj): argparse parser of delete command
+    """
+    delete_parser.add_argument('--vm-name', required=True, help=__HELP_VM_NAME, dest='vm_to_be_deleted',
+                               type=str)
+
+
+def __add_reset_arguments(reset_parser):
+    """
+    To add arguments of reset command
+    Args:
+        reset_parser  (obj): argparse parser of reset command
+    """
+    reset_parser.add_argument('--vm-name', required=True, help=__HELP_VM_NAME, dest='vm_to_be_reset',
+                              type=str)
+
+
+def __add_power_on_arguments(power_on_parser):
+    """
+    To add arguments of power-on command
+    Args:
+        power_on_parser  (obj): argparse parser of power-on command
+    """
+    power_on_parser.add_argument('--vm-name', required=True, help=__HELP_VM_NAME, dest='vm_to_be_powered_on',
+                                 type=str)
+
+
+def __add_power_off_arguments(power_off_parser):
+    """
+    To add arguments of power-off command
+    Args:
+        power_off_parser  (obj): argparse parser of power-off command
+    """
+    power_off_parser.add_argument('--vm-name', required=True, help=__HELP_VM_NAME, dest='vm_to_be_powered_off',
+                                  type=str)
+
+
+def __add_clone_arguments(clone_parser):
+    """
+    To add arguments of clone command
+    Args:
+        clone_parser  (obj): argparse parser of clone command
+    """
+    clone_parser.add_argument('--json-file', required=True, help=__HELP_JSON_FILE,
+                              dest='json_file', type=str)
+
+
+# Command name -> (help, function to add command arguments), in the order shown by --help
+__COMMANDS = (
+    ('create', ("To create a VM", __add_create_arguments)),
+    ('delete', ('To delete an existing VM', __add_delete_arguments)),
+    ('reset', ('To reset an existing VM', __add_reset_arguments)),
+    ('power-on', ('To power on an existing VM', __add_power_on_arguments)),
+    ('power-off', ('To power off existing VM', __add_power_off_arguments)),
+    ('clone', ('To clone VM from template', __add_clone_arguments)),
+)
+__COMMAND_NAMES = frozenset(name for name, _ in __COMMANDS)
+
+
+def __expand_option(arg):
+    """
+    To resolve an unambiguous prefix of a global long option, as argparse does
+    Args:
+        arg     (str): Command-line argument starting with '-'
+    Returns:
+        str:    Full option name, or arg itself if it is not a prefix of exactly one option
+    """
+    if arg.startswith('--') and arg not in __GLOBAL_LONG_OPTIONS:
+        matches = [option for option in __GLOBAL_LONG_OPTIONS if option.startswith(arg)]
+        if len(matches) == 1:
+            return matches[0]
+    return arg
+
+
+def __get_command_name(argv):
+    """
+    To find the requested command without parsing all arguments
+    Skips global options, including abbreviated long options, along with their values
+    Args:
+        argv    (list): Command-line arguments without program name
+    Returns:
+        str:    Command name or None if not found
+    """
+    skip_next = False
+    for arg in argv:
+        if skip_next:
+            skip_next = False
+        elif arg.startswith('-'):
+            skip_next = __expand_option(arg) in __OPTIONS_WITH_VALUE
+        else:
+            return arg
+    return None
 
 
 def __get_args():
     """
     To Get all command-line argument from the program
+    Only the requested command's subparser is built. Every command is listed by name and help
+    for top-level help, or when the command is missing or unknown
     Returns:
         dict:   All parsed argument
     """
-    parser = argparse.ArgumentParser(prog="{0}".format(__about__.__title__),
-                                     description="{0}".format(__about__.__description__),
+    from __about__ import __title__, __description__, __version__
+    parser = argparse.ArgumentParser(prog=__title__,
+                                     description=__description__,
                                      add_help=True)
 
     auth = parser.add_argument_group('Authentication')
-    auth.add_argument('--host', nargs=1, required=True,
+    auth.add_argument('--host', required=True,
                       help='The vCenter or ESXi host to connect to',
                       dest='host', type=str)
-    auth.add_argument('--port', nargs=1, required=False,
+    auth.add_argument('--port', required=False,
                       help='Server port to connect to (default = 443)',
-                      dest='port', type=int, default=[443])
-    auth.add_argument('--username', nargs=1, required=True,
+                      dest='port', type=int, default=443)
+    auth.add_argument('--username', required=True,
                       help='The username with which to connect to the host',
                       dest='username', type=str)
-    auth.add_argument('--password', nargs=1, required=False,
+    auth.add_argument('--password', required=False,
                       help='If not provided then prompt to enter.',
-                      dest='password', type=str, default=[""])
+                      dest='password', type=str)
     auth.add_argument('-s', '--disable-SSL-certificate-verification', required=False,
                       help='Disable SSL certificate verification on connect like a switch',
                       dest='ssl_check', action='store_true', default=False)
     auth.add_argument('-d', '--debug', required=False,
                       help='Enable debug output like a switch', dest='debug',
                       action='store_true', default=False)
-    auth.add_argument('-l', '--log-file', nargs=1, required=False,
+    auth.add_argument('-l', '--log-file', required=False,
                       help='log file name. default is stdout',
-                      dest='log_file', type=str, default=[""])
-    auth.add_argument('--version', action='version', version='%(prog)s {0}'.format(__about__.__version__))
-
-    subparsers = parser.add_subparsers(description="Commands to perform different operation in ESX Host")
-    # Create
-    create_parser = subparsers.add_parser('create', help="To create a VM")
-    create_parser.add_argument('--json-file', nargs=1, required=True, help='Json file containing all VM data',
-                               dest='create_json_file', type=str, default=[""])
-    # Delete
-    delete_parser = subparsers.add_parser('delete', help='To delete an existing VM')
-    delete_parser.add_argument('--vm-name', nargs=1, required=True, help='VM name', dest='vm_to_be_deleted',
-                               type=str)
-    # Reset
-    reset_parser = subparsers.add_parser('reset', help='To reset an existing VM')
-    reset_parser.add_argument('--vm-name', nargs=1, required=True, help='VM name', dest='vm_to_be_reset',
-                              type=str)
-    # Power On
-    power_on_parser = subparsers.add_parser('power-on', help='To power on an existing VM')
-    power_on_parser.add_argument('--vm-name', nargs=1, required=True, help='VM name', dest='vm_to_be_powered_on',
-                                 type=str)
-    # Power Off
-    power_off_parser = subparsers.add_parser('power-off', help='To power off existing VM')
-    power_off_parser.add_argument('--vm-name', nargs=1, required=True, help='VM name', dest='vm_to_be_powered_off',
-                                  type=str)
-    # Clone
-    clone_parser = subparsers.add_parser('clone', help='To clone VM from template')
-    clone_parser.add_argument('--json-file', nargs=1, required=True, help='Json file containing all VM data',
-                              dest='clone_json_file', type=str, default=[""])
+                      dest='log_file', type=str)
+    auth.add_argument('--version', action='version', version='%(prog)s {0}'.format(__version__))
+
+    subparsers = parser.add_subparsers(description="Commands to perform different operation in ESX Host",
+                                       dest='cmd')
+    subparsers.required = True
+    parser.set_defaults(json_file=None)
+    argv = sys.argv[1:]
+    command_name = __get_command_name(argv)
+    list_all = command_name not in __COMMAND_NAMES or \
+        any(__expand_option(option) in ('-h', '--help') for option in __get_global_options(argv))
+    for name, (command_help, add_arguments) in __COMMANDS:
+        if list_all or name == command_name:
+            command_parser = subparsers.add_parser(name, help=command_help)
+            if name == command_name:
+                add_arguments(command_parser)
     return parser.parse_args()
 
 
-def __get_value(config_dict, key, default=None, required=True):
+def __get_global_options(argv):
+    """
+    To get the command-line arguments given before the command, where argparse accepts global options
+    Args:
+        argv    (list): Command-line arguments without program name
+    Returns:
+        list:   Arguments before the command, or all of them if no command is given
+    """
+    command_name = __get_command_name(argv)
+    return argv[:argv.index(command_name)] if command_name else argv
+
+
+def __is_version_requested(argv):
     """
-    To get value from configuration dictionary
-    if required then we expect value
+    To check for --version among the global options, the same place argparse accepts it
+    Args:
+        argv    (list): Command-line arguments without program name
+    Returns:
+        bool:   True if version is requested before any command
+    """
+    return any(__expand_option(option) == '--version' for option in __get_global_options(argv))
+
+
+# Format of every log record, shared by the handler added to the root logger
+__LOG_FORMATTER = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+
+# Keys expected in json configuration. Required keys must have a value,
+# optional keys are paired with the default used when they are missing
+__CREATE_REQUIRED = ('vm-name', 'datastore', 'resource-pool', 'hard-disk', 'cd-drive', 'network-card')
+__CREATE_OPTIONAL = (('datacenter', None), ('folder', None), ('power-on', False), ('memory-MB', 4096),
+                     ('num-CPUs', 1), ('guest-OS-id', "otherGuest64"), ('version', "vmx-08"))
+__CLONE_REQUIRED = ('vm-name', 'template', 'datastore', 'resource-pool', 'network-card')
+__CLONE_OPTIONAL = (('datacenter', None), ('folder', None), ('power-on', False))
+__NETWORK_CARD_UPDATE_OPTIONAL = (('update', ()),)
+
+
+def __get_values(config_dict, required_keys=(), optional_keys=()):
+    """
+    To get all values from configuration dictionary in a single pass
+    Every required key must have a value
     Args:
         config_dict     (dict): Configuration in dict format
-        key             (str):  Dict Key to get value
-        default         (str or bool): Default value if Dict key is not present
-        required        (bool): True or False
+        required_keys   (tuple): Dict keys which must have a value
+        optional_keys   (tuple): (Dict key, default value) pairs used if Dict key is not present
     Returns:
-        str:            Value from dict[key]
+        dict:           Value of every required and optional key
     Raise:
         ValueRequired Exception
     """
-    # Known Issue: problem if passed default=True and required=True
-    value = config_dict.get(key, default)
-    if not value and required:
-        raise ValueRequired("Value required from json for key ({0})".format(key))
-    return value
+    missing_keys = [key for key in required_keys if not config_dict.get(key)]
+    if missing_keys:
+        raise ValueRequired("Value required from json for key ({0})".format(', '.join(missing_keys)))
+    values = dict((key, config_dict.get(key, default)) for key, default in optional_keys)
+    values.update((key, config_dict[key]) for key in required_keys)
+    return values
 
 
 def __error_handler(called_func):
@@ -135,7 +279,11 @@ def __error_handler(called_func):
             called_func(*args, **kwargs)
             return 0
         except KeyError as exception:
-            print "Missing required key('{0}') in json file".format(exception.message)
+            missing_key = exception.args[0] if exception.args else exception
+            print("Missing required key('{0}') in json file".format(missing_key))
+            return -1
+        except (ValueRequired, InvalidConfigurationFromJson, JSONFileNotFound) as exception:
+            logging.getLogger(__name__).error(exception)
             return -1
 
     return func_wrapper
@@ -144,6 +292,7 @@ def __error_handler(called_func):
 def __get_logger(log_file, debug):
     """
     To get logger based on python logging module
+    The root logger is configured only once, later calls reuse it
     Args:
         log_file  (str): Log Filename where log will be written
         debug     (bool): Log Debug flag
@@ -151,18 +300,42 @@ def __get_logger(log_file, debug):
     Returns:
         obj:       Logging object
     """
-    if debug:
-        log_level = logging.DEBUG
-    else:
-        log_level = logging.INFO
-    if log_file:
-        logging.basicConfig(filename=log_file, format='%(asctime)s %(levelname)s %(message)s', level=log_level)
-    else:
-        logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s', level=log_level)
+    root_logger = logging.getLogger()
+    if not any(handler.formatter is __LOG_FORMATTER for handler in root_logger.handlers):
+        if log_file:
+            handler = logging.FileHandler(log_file)
+        else:
+            handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(__LOG_FORMATTER)
+        root_logger.addHandler(handler)
+        # Messages are colored only when the log goes to a terminal, never into a log file
+        from host import ESXHost
+        ESXHost.use_colors = handler.stream.isatty()
+        root_logger.setLevel(logging.DEBUG if debug else logging.INFO)
     logger = logging.getLogger(__name__)
     return logger
 
 
+def __get_json_loads():
+    """
+    To get the fastest available json parser
+    orjson or ujson is used if installed, otherwise the standard json module
+    Returns:
+        obj:       Function parsing json document from bytes
+    """
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        return ujson.loads
+    except ImportError:
+        import json
+        return json.loads
+
+
 def __get_config_from_json(json_file):
     """
     To get all configuration from specified json file
@@ -176,144 +349,215 @@ def __get_config_from_json(json_file):
     """
     if not os.path.exists(json_file):
         raise JSONFileNotFound("JSON file ({0}) not found".format(json_file))
-    with open(json_file, 'r') as jsonfile:
-        all_config = json.load(jsonfile)
+    with open(json_file, 'rb') as jsonfile:
+        all_config = __get_json_loads()(jsonfile.read())
     if not all_config:
         raise InvalidConfigurationFromJson(msg="Invalid/Empty Configuration from json file ({0})"
                                            .format(json_file))
     return all_config
 
 
-@__error_handler
-def main():
+def __get_virtual_machine(esx_host, vm_name):
     """
-    Main entry point for __main__.py
-    Steps:
-        1. Will take all user defined arguments
-        2. Will process json configuration if passed
-        3. Create or Delete or Clone Virtual Machine
+    To get virtual machine object sharing the connection of esx_host
+    Args:
+        esx_host  (obj):  Connected ESXHost object
+        vm_name   (str):  Virtual machine name
+    Returns:
+        obj:      VirtualMachine object
     """
-    # get all args
-    all_args = __get_args()
-    hostname = all_args.host[0]
-    port = all_args.port[0]
-    username = all_args.username[0]
-    password = all_args.password[0]
-    if not password:
-        password = getpass.getpass(prompt='Enter password to login to %s for user %s: ' % (hostname, username))
-    ssl_check = all_args.ssl_check
-    debug = all_args.debug
-    log_file = all_args.log_file[0]
-    logging_obj = __get_logger(log_file, debug)
-    # Get json file
-    create_json_file = all_args.create_json_file[0] if hasattr(all_args, 'create_json_file') else None
-    clone_json_file = all_args.clone_json_file[0] if hasattr(all_args, 'clone_json_file') else None
-    vm_to_be_deleted = all_args.vm_to_be_deleted[0] if hasattr(all_args, 'vm_to_be_deleted') else None
-    vm_to_be_reset = all_args.vm_to_be_reset[0] if hasattr(all_args, 'vm_to_be_reset') else None
-    vm_to_be_powered_on = all_args.vm_to_be_powered_on[0] if hasattr(all_args, 'vm_to_be_powered_on') else None
-    vm_to_be_powered_off = all_args.vm_to_be_powered_off[0] if hasattr(all_args, 'vm_to_be_powered_off') else None
-    # Process Json file for create operation
-    if create_json_file:
-        all_config = __get_config_from_json(create_json_file)
-    # Process Json file for Clone operation
-    if clone_json_file:
-        all_config = __get_config_from_json(clone_json_file)
-    # Create Operation
-    if create_json_file:
-        vm_name = __get_value(all_config, 'vm-name', required=True)
-        datacenter = __get_value(all_config, 'datacenter', required=False)
-        datastore = __get_value(all_config, 'datastore', required=True)
-        resource_pool = __get_value(all_config, 'resource-pool', required=True)
-        folder = __get_value(all_config, 'folder', required=False)
-        power_on_flag = __get_value(all_config, 'power-on', default=False, required=False)
-        memory_in_MB = __get_value(all_config, 'memory-MB', default=4096, required=False)
-        num_of_CPUs = __get_value(all_config, 'num-CPUs', default=1, required=False)
-        guest_OS_id = __get_value(all_config, 'guest-OS-id', default="otherGuest64", required=False)
-        version = __get_value(all_config, 'version', default="vmx-08", required=False)
-        hard_disk_specs = __get_value(all_config, 'hard-disk', required=True)
-        cd_drive_specs = __get_value(all_config, 'cd-drive', required=True)
-        network_card_specs = __get_value(all_config, 'network-card', required=True)
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_name)
-        vm.set_datacenter_obj(datacenter)
-        vm.set_datastore_obj(datastore)
-        vm.set_resource_pool_obj(resource_pool)
-        vm.set_folder_obj(folder)
-        vm.create(memory_in_MB, num_of_CPUs, guest_OS_id, version)
-        for hard_disk_spec in hard_disk_specs:
-            vm.add_hard_disk(disk_label=__get_value(hard_disk_spec, 'disk-label', required=True),
-                             capacity_in_KB=__get_value(hard_disk_spec, 'capacity-KB', required=True))
-        for cd_drive_spec in cd_drive_specs:
-            iso_datastore = __get_value(cd_drive_spec, 'iso-datastore', default=None, required=False)
-            iso_filename = __get_value(cd_drive_spec, 'iso-filename', default=None, required=False)
-            is_connected = __get_value(cd_drive_spec, 'Connected', default=False, required=False)
+    # Imported only after arguments are valid, as it pulls pyVmomi and its dependencies
+    from virtual_machine import VirtualMachine
+    return VirtualMachine(host=esx_host.host, username=esx_host.username, password=esx_host.password,
+                          port=esx_host.port, logger=esx_host.logger, ssl_check=esx_host.ssl_check,
+                          vm_name=vm_name, connection=esx_host)
+
+
+def __create(all_args, esx_host, all_config):
+    """
+    Create Operation based on create json file
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): All configuration from create json file
+    """
+    from pyVmomi import vim
+    from virtual_machine import VirtualMachine, VirtualMachineCreationFailure
+    config = __get_values(all_config, __CREATE_REQUIRED, __CREATE_OPTIONAL)
+    # Checked before any round trip, with the same validation create does
+    try:
+        VirtualMachine.check_create_values(config['memory-MB'], config['num-CPUs'], config['guest-OS-id'],
+                                           config['version'])
+    except (TypeError, VirtualMachineCreationFailure) as exception:
+        raise InvalidConfigurationFromJson(msg="Invalid configuration from json file: {0}".format(exception))
+    vm = __get_virtual_machine(esx_host, config['vm-name'])
+    vm.set_datacenter_obj(config['datacenter'])
+    vm.index_objects([vim.Datastore, vim.ResourcePool, vim.Folder], container=vm.datacenter_obj)
+    vm.set_datastore_obj(config['datastore'])
+    vm.set_resource_pool_obj(config['resource-pool'])
+    vm.set_folder_obj(config['folder'])
+    vm.create(config['memory-MB'], config['num-CPUs'], config['guest-OS-id'], config['version'])
+    with vm.reconfigure_batch():
+        for hard_disk_spec in config['hard-disk']:
+            disk_label = hard_disk_spec.get('disk-label')
+            if not disk_label:
+                raise ValueRequired("Value required from json for key (disk-label)")
+            capacity_in_KB = hard_disk_spec.get('capacity-KB')
+            if not capacity_in_KB:
+                raise ValueRequired("Value required from json for key (capacity-KB)")
+            vm.add_hard_disk(disk_label=disk_label, capacity_in_KB=capacity_in_KB)
+        for cd_drive_spec in config['cd-drive']:
+            iso_datastore = cd_drive_spec.get('iso-datastore')
+            iso_filename = cd_drive_spec.get('iso-filename')
             if iso_filename and iso_datastore:
                 iso_file_name = "[{0}] {1}".format(iso_datastore, iso_filename)
             else:
                 iso_file_name = None
-            vm.add_cdrom(iso_file_name=iso_file_name, startConnected=is_connected)
-        for network_card_spec in network_card_specs:
-            vm.add_network_card(mac_address=__get_value(network_card_spec, 'mac-address', required=False),
-                                network_label=__get_value(network_card_spec, 'network-label', required=True),
-                                mac_address_type=__get_value(network_card_spec, 'mac-address-type', required=True),
-                                connected=__get_value(network_card_spec, 'connected', default=False, required=False),
-                                summary=__get_value(network_card_spec, 'summary',
-                                                    default="Default summary for VM Automation",
-                                                    required=False))
-        if power_on_flag:
-            vm.power_on()
-    # Delete Operation
-    if vm_to_be_deleted:
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_to_be_deleted)
-        vm.power_off()
-        vm.delete()
-    # Reset Operation
-    if vm_to_be_reset:
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_to_be_reset)
-        vm.reset()
-    # Power on Operation
-    if vm_to_be_powered_on:
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_to_be_powered_on)
+            vm.add_cdrom(iso_file_name=iso_file_name, startConnected=cd_drive_spec.get('Connected', False))
+        for network_card_spec in config['network-card']:
+            network_label = network_card_spec.get('network-label')
+            if not network_label:
+                raise ValueRequired("Value required from json for key (network-label)")
+            mac_address_type = network_card_spec.get('mac-address-type')
+            if not mac_address_type:
+                raise ValueRequired("Value required from json for key (mac-address-type)")
+            vm.add_network_card(mac_address=network_card_spec.get('mac-address'),
+                                network_label=network_label,
+                                mac_address_type=mac_address_type,
+                                connected=network_card_spec.get('connected', False),
+                                summary=network_card_spec.get('summary', "Default summary for VM Automation"))
+    if config['power-on']:
         vm.power_on()
-    # power off Operation
-    if vm_to_be_powered_off:
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_to_be_powered_off)
-        vm.power_off()
-    # Clone Operation
-    if clone_json_file:
-        vm_name = __get_value(all_config, 'vm-name', required=True)
-        template = __get_value(all_config, 'template', required=True)
-        datacenter = __get_value(all_config, 'datacenter', required=False)
-        datastore = __get_value(all_config, 'datastore', required=True)
-        resource_pool = __get_value(all_config, 'resource-pool', required=True)
-        folder = __get_value(all_config, 'folder', required=False)
-        power_on_flag = __get_value(all_config, 'power-on', default=False, required=False)
-        network_card_specs = __get_value(all_config, 'network-card', required=True)
-        updated_network_card_specs = __get_value(network_card_specs, 'update', required=False)
-        vm = VirtualMachine(host=hostname, username=username, password=password, port=port, logger=logging_obj,
-                            ssl_check=ssl_check, vm_name=vm_name)
-        vm.set_datacenter_obj(datacenter)
-        vm.set_datastore_obj(datastore)
-        vm.set_resource_pool_obj(resource_pool)
-        vm.set_folder_obj(folder)
-        vm.clone_from_template(template_name=template)
-        for updated_network_card_spec in updated_network_card_specs:
-            nic_hdw_name = __get_value(updated_network_card_spec, 'nic-hdw-name', required=True)
-            new_mac_address = __get_value(updated_network_card_spec, 'new-mac-address', required=False)
-            new_network_label = __get_value(updated_network_card_spec, 'new-network-label', required=False)
-            is_connected = __get_value(updated_network_card_spec, 'connected', required=False)
+
+
+def __delete(all_args, esx_host, all_config):
+    """
+    Delete Operation, virtual machine is powered off first
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): Not used, this command has no json file
+    """
+    vm = __get_virtual_machine(esx_host, all_args.vm_to_be_deleted)
+    vm.power_off()
+    vm.delete()
+
+
+def __reset(all_args, esx_host, all_config):
+    """
+    Reset Operation
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): Not used, this command has no json file
+    """
+    __get_virtual_machine(esx_host, all_args.vm_to_be_reset).reset()
+
+
+def __power_on(all_args, esx_host, all_config):
+    """
+    Power on Operation
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): Not used, this command has no json file
+    """
+    __get_virtual_machine(esx_host, all_args.vm_to_be_powered_on).power_on()
+
+
+def __power_off(all_args, esx_host, all_config):
+    """
+    Power off Operation
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): Not used, this command has no json file
+    """
+    __get_virtual_machine(esx_host, all_args.vm_to_be_powered_off).power_off()
+
+
+def __clone(all_args, esx_host, all_config):
+    """
+    Clone Operation based on clone json file
+    Args:
+        all_args    (obj):  All parsed argument
+        esx_host    (obj):  Connected ESXHost object
+        all_config  (dict): All configuration from clone json file
+    """
+    config = __get_values(all_config, __CLONE_REQUIRED, __CLONE_OPTIONAL)
+    network_cards = __get_values(config['network-card'], optional_keys=__NETWORK_CARD_UPDATE_OPTIONAL)
+    vm = __get_virtual_machine(esx_host, config['vm-name'])
+    vm.prepare_clone(config['template'], config['datacenter'], config['datastore'], config['resource-pool'],
+                     config['folder'])
+    vm.clone_from_template(template_name=config['template'])
+    with vm.reconfigure_batch():
+        for updated_network_card_spec in network_cards['update']:
+            nic_hdw_name = updated_network_card_spec.get('nic-hdw-name')
+            if not nic_hdw_name:
+                raise ValueRequired("Value required from json for key (nic-hdw-name)")
+            new_mac_address = updated_network_card_spec.get('new-mac-address')
+            new_network_label = updated_network_card_spec.get('new-network-label')
+            is_connected = updated_network_card_spec.get('connected')
             if new_mac_address:
                 vm.update_mac_address(nic_hdw_name, new_mac_address)
             if new_network_label:
                 vm.update_network_label(nic_hdw_name, new_network_label)
             if is_connected:
                 vm.update_nic_state(nic_hdw_name, is_connected)
-        if power_on_flag:
-            vm.power_on()
+    if config['power-on']:
+        vm.power_on()
+
+
+# Command name -> function performing the operation
+__COMMAND_HANDLERS = {
+    'create': __create,
+    'delete': __delete,
+    'reset': __reset,
+    'power-on': __power_on,
+    'power-off': __power_off,
+    'clone': __clone,
+}
+
+
+@__error_handler
+def main():
+    """
+    Main entry point for __main__.py
+    Steps:
+        1. Will take all user defined arguments
+        2. Will process json configuration if passed and import pyVmomi, while asking for password and connecting
+           to the host
+        3. Will run the requested command
+    """
+    if __is_version_requested(sys.argv[1:]):
+        # Same output as argparse's version action, without building any parser
+        from __about__ import __title__, __version__
+        print('{0} {1}'.format(__title__, __version__))
+        return
+    # get all args
+    all_args = __get_args()
+    executor = ThreadPoolExecutor(max_workers=3)
+    try:
+        config_future = None
+        if all_args.json_file:
+            config_future = executor.submit(__get_config_from_json, all_args.json_file)
+        # pyVmomi takes a noticeable time to import, so it is imported while waiting for the password
+        executor.submit(importlib.import_module, 'virtual_machine')
+        password = all_args.password
+        if not password:
+            password = getpass.getpass(prompt='Enter password to login to {0} for user {1}: '.format(
+                all_args.host, all_args.username))
+        logging_obj = __get_logger(all_args.log_file, all_args.debug)
+        from host import ESXHost
+        # Single connection shared by every virtual machine operation of this run
+        connection_future = executor.submit(ESXHost, host=all_args.host, username=all_args.username,
+                                            password=password, port=all_args.port, logger=logging_obj,
+                                            ssl_check=all_args.ssl_check)
+        all_config = config_future.result() if config_future else None
+        esx_host = connection_future.result()
+    finally:
+        executor.shutdown(wait=False)
+    __COMMAND_HANDLERS[all_args.cmd](all_args, esx_host, all_config)
 
 
 if __name__ == "__main__":
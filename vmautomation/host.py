@@ -1,12 +1,18 @@
 #!/usr/bin/env python
 
-import requests
-import progressbar
-import time
-import sys
-from pyVim.connect import SmartConnect, Disconnect
-from pyVmomi import vim, vmodl
+import atexit
+import logging
 import ssl
+import sys
+import threading
+import time
+from queue import Queue
+
+# ANSI escape sequences used to color messages
+SUCCESS_COLOR = "\x1b[6;30;42m"
+FAILURE_COLOR = "\x1b[0;30;41m"
+INFORMATIVE_COLOR = "\x1b[6;30;44m"
+RESET_COLOR = "\x1b[0m"
 
 
 class FailedToConnect(Exception):
@@ -15,15 +21,130 @@ class FailedToConnect(Exception):
     """
 
     def __init__(self, msg="Failed to Connect Exception"):
-        super(FailedToConnect, self).__init__(msg)
+        super().__init__(msg)
+
+
+class _TaskWaiter:
+    """
+    Task Waiter to wait for every task of a connection with one property collector and one background thread
+    The thread waits for updates of all watched tasks, and hands them to the queue of each task
+    """
+
+    def __init__(self, connection_obj, wait_seconds, logger):
+        """
+        Constructor for _TaskWaiter
+        Args:
+            connection_obj: (obj): Connected service instance
+            wait_seconds:   (int): Maximum seconds the server holds an update request open before returning empty
+            logger:         (obj): Logger object to manage logging
+        """
+        self.collector = connection_obj.content.propertyCollector.CreatePropertyCollector()
+        self.wait_seconds = wait_seconds
+        self.logger = logger
+        self.queues = {}
+        self.lock = threading.Lock()
+        self.failure = None
+        thread = threading.Thread(target=self.__wait_for_updates, name='vsphere-task-waiter')
+        thread.daemon = True
+        thread.start()
+
+    def watch(self, task_obj):
+        """
+        To start receiving description id, state, progress, error and result changes of a task
+        Args:
+            task_obj:       (obj): ESXHost task object
+        Returns:
+            tuple:          (property filter to pass to unwatch, queue of changes dict or exception)
+        """
+        from pyVmomi import vim, vmodl
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=task_obj)],
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=vim.Task,
+                                                                pathSet=['info.descriptionId', 'info.state',
+                                                                         'info.progress', 'info.error',
+                                                                         'info.result'])])
+        updates = Queue()
+        # Held while creating the filter, so its first update can't be dispatched before its queue exists
+        with self.lock:
+            if self.failure:
+                raise self.failure
+            property_filter = self.collector.CreateFilter(filter_spec, True)
+            self.queues[property_filter] = updates
+        return property_filter, updates
+
+    def unwatch(self, property_filter):
+        """
+        To stop receiving changes of a task
+        Args:
+            property_filter:    (obj): Property filter returned by watch
+        """
+        with self.lock:
+            self.queues.pop(property_filter, None)
+        if not self.failure:
+            property_filter.Destroy()
+
+    def __wait_for_updates(self):
+        """
+        Background thread waiting for updates of every watched task
+        On failure, every waiting task gets the exception and the waiter stops
+        """
+        from pyVmomi import vmodl
+        wait_options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=self.wait_seconds)
+        version = None
+        while True:
+            try:
+                update_set = self.collector.WaitForUpdatesEx(version, wait_options)
+            except Exception as exception:
+                self.logger.debug('Task waiter stopped: %s', exception)
+                with self.lock:
+                    self.failure = exception
+                    for updates in self.queues.values():
+                        updates.put(exception)
+                return
+            if not update_set:
+                continue
+            version = update_set.version
+            with self.lock:
+                for filter_update in update_set.filterSet:
+                    updates = self.queues.get(filter_update.filter)
+                    if updates is None:
+                        continue
+                    updates.put(dict((change.name, change.val) for object_update in filter_update.objectSet
+                                     for change in object_update.changeSet))
 
 
-class ESXHost(object):
+class ESXHost:
     """
     ESX Host class to manage connection, different objects and task progress
     """
+    __slots__ = ('connection_obj', 'host', 'port', 'username', 'password', 'logger', 'ssl_check')
+    # Number of objects retrieved per page while indexing objects by name
+    RETRIEVE_PAGE_SIZE = 100
+    # Maximum seconds the server holds a task update request open before returning empty
+    TASK_WAIT_SECONDS = 30
+    # Connections shared by every ESXHost object, keyed by (host, port, username)
+    connection_pool = {}
+    # Guards connection_pool, so threads sharing a host log in only once
+    connection_lock = threading.Lock()
+    # Kept-alive HTTP connections per session, enough for the task waiter long poll and concurrent batch operations
+    CONNECTION_POOL_SIZE = 8
+    # Seconds between keepalive calls, well inside the default 30 minutes session timeout of vCenter
+    KEEPALIVE_SECONDS = 600
+    keepalive_thread = None
+    # Name to object reference index of every retrieved object type,
+    # keyed by (id(connection_obj), obj_type, container) where container None is the root folder
+    object_index = {}
+    # Monotonic time every index was built at, with the same keys as object_index
+    object_index_time = {}
+    # Seconds after which a name missing from an index is looked up again, objects may have been created since
+    INDEX_MAX_AGE_SECONDS = 60
+    # Task waiter of every connection, keyed by id(connection_obj)
+    task_waiters = {}
+    # Messages are colored only when logs and progress bars go to a terminal,
+    # the command line sets it again from the log handler it configures
+    use_colors = sys.stderr.isatty()
 
-    def __init__(self, host, username, password, port, logger, ssl_check):
+    def __init__(self, host, username, password, port, logger, ssl_check, connection=None):
         """
         Constructor for ESXHost
         Args:
@@ -33,6 +154,7 @@ class ESXHost(object):
             port:       (int): port number for connection
             logger:     (obj): Logger object to manage logging
             ssl_check:  (bool): False to disable SSL Check and True to enable it
+            connection: (obj): Connected ESXHost object whose session will be shared, Default is None
         """
         self.connection_obj = None
         self.host = host
@@ -41,7 +163,10 @@ class ESXHost(object):
         self.password = password
         self.logger = logger
         self.ssl_check = ssl_check
-        self.__connect_to_esx()
+        if connection:
+            self.connection_obj = connection.connection_obj
+        else:
+            self.__connect_to_esx()
 
     def get_success_message(self, msg_content):
         """
@@ -51,7 +176,9 @@ class ESXHost(object):
         Returns:
             str:            Return success message
         """
-        return "{0}{1}{2}".format("\x1b[6;30;42m", msg_content, "\x1b[0m")
+        if not self.use_colors:
+            return msg_content
+        return '{0}{1}{2}'.format(SUCCESS_COLOR, msg_content, RESET_COLOR)
 
     def get_failure_message(self, msg_content):
         """
@@ -61,7 +188,9 @@ class ESXHost(object):
         Returns:
             str:            Return failure message
         """
-        return "{0}{1}{2}".format("\x1b[0;30;41m", msg_content, "\x1b[0m")
+        if not self.use_colors:
+            return msg_content
+        return '{0}{1}{2}'.format(FAILURE_COLOR, msg_content, RESET_COLOR)
 
     def get_informative_message(self, msg_content):
         """
@@ -71,23 +200,46 @@ class ESXHost(object):
         Returns:
             str:            Return informative message
         """
-        return "{0}{1}{2}".format("\x1b[6;30;44m", msg_content, "\x1b[0m")
+        if not self.use_colors:
+            return msg_content
+        return '{0}{1}{2}'.format(INFORMATIVE_COLOR, msg_content, RESET_COLOR)
 
     def __connect_to_esx(self):
         """
         Private method to connect to esx
-        This will be called everytime ESX host has been initialized
+        This will be called everytime ESX host has been initialized without a connection
+        An existing connection to the same host and username is reused
+        """
+        with self.connection_lock:
+            self.__connect_or_reuse()
+            if ESXHost.keepalive_thread is None:
+                ESXHost.keepalive_thread = threading.Thread(target=ESXHost.keep_alive, name='vsphere-keepalive')
+                ESXHost.keepalive_thread.daemon = True
+                ESXHost.keepalive_thread.start()
+
+    def __connect_or_reuse(self):
         """
+        To connect to esx, or reuse an existing connection to the same host and username
+        Called with connection_lock held
+        """
+        from pyVim.connect import SmartConnect
+        from pyVmomi import vim
+        pool_key = (self.host, self.port, self.username)
+        if pool_key in self.connection_pool:
+            self.logger.debug('Reusing connection to server %s:%s with username %s',
+                              self.host, self.port, self.username)
+            self.connection_obj = self.connection_pool[pool_key][0]
+            return
         ssl_context = None
         if not self.ssl_check:
             self.logger.debug('Disabling SSL certificate verification.')
+            import requests
             requests.packages.urllib3.disable_warnings()
-            if hasattr(ssl, 'SSLContext'):
-                ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
-                ssl_context.verify_mode = ssl.CERT_NONE
+            if hasattr(ssl, '_create_unverified_context'):
+                # Negotiates the best protocol version both ends support, unlike pinning TLSv1
+                ssl_context = ssl._create_unverified_context()
         try:
-            self.logger.info(
-                'Connecting to server {0}:{1} with username {2}'.format(self.host, self.port, self.username))
+            self.logger.info('Connecting to server %s:%s with username %s', self.host, self.port, self.username)
             if ssl_context:
                 self.connection_obj = SmartConnect(host=self.host, user=self.username, pwd=self.password,
                                                    port=int(self.port), sslContext=ssl_context)
@@ -95,88 +247,292 @@ class ESXHost(object):
                 self.connection_obj = SmartConnect(host=self.host, user=self.username, pwd=self.password,
                                                    port=int(self.port))
         except (ssl.SSLError, IOError, vim.fault.InvalidLogin) as exception:
-            self.logger.error('{0} while connecting to server {1}:{2} with username {3}'.format(
-                exception, self.host, self.port, self.username))
+            self.logger.error('%s while connecting to server %s:%s with username %s',
+                              exception, self.host, self.port, self.username)
         if not self.connection_obj:
-            self.logger.error('Could not connect to host {0} with user {1} and specified password'.format(
-                self.get_failure_message("{0}:{1}".format(self.host, self.port)), self.username))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('Could not connect to host %s with user %s and specified password',
+                                  self.get_failure_message("{0}:{1}".format(self.host, self.port)), self.username)
             raise FailedToConnect(msg="Failed to connect to {0}:{1} using username ({2})"
                                   .format(self.host, self.port, self.username))
         else:
-            self.logger.info(
-                'Successfully connected to server {0}:{1} with username {2}'.format(self.host, self.port,
-                                                                                    self.username))
+            self.logger.info('Successfully connected to server %s:%s with username %s',
+                             self.host, self.port, self.username)
+            # SOAP stub keeps HTTP connections alive in a pool, sized for threads sharing this session
+            self.connection_obj._stub.poolSize = self.CONNECTION_POOL_SIZE
+            self.connection_pool[pool_key] = (self.connection_obj, self.logger)
+
+    def __index_objects(self, type_groups, container=None):
+        """
+        To build name to object reference indexes of several type groups with a single retrieval
+        Names of all objects are retrieved in pages through a temporary container view.
+        Groups which are already indexed are skipped.
+        Args:
+            type_groups:    (list): Tuples of ESXHost object types, one index is built per tuple
+            container:      (obj): Folder, datacenter or other container to search in, Default is None for root folder
+        """
+        from pyVmomi import vim, vmodl
+        missing_groups = [group for group in type_groups
+                          if (id(self.connection_obj), group, container) not in self.object_index]
+        if not missing_groups:
+            return
+        all_types = []
+        for group in missing_groups:
+            all_types.extend(each_type for each_type in group if each_type not in all_types)
+        content = self.connection_obj.content
+        collector = content.propertyCollector
+        container_view = content.viewManager.CreateContainerView(container or content.rootFolder, all_types, True)
+        traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(name='traverseView', path='view', skip=False,
+                                                                     type=vim.view.ContainerView)
+        obj_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=container_view, skip=True,
+                                                            selectSet=[traversal_spec])
+        property_specs = [vmodl.query.PropertyCollector.PropertySpec(type=each_type, pathSet=['name'], all=False)
+                          for each_type in all_types]
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=[obj_spec], propSet=property_specs)
+        retrieve_options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=self.RETRIEVE_PAGE_SIZE)
+        indexes = dict((group, {}) for group in missing_groups)
+        trace_objects = self.logger.isEnabledFor(logging.DEBUG)
+        try:
+            result = collector.RetrievePropertiesEx([filter_spec], retrieve_options)
+            while result:
+                for object_content in result.objects:
+                    if not object_content.propSet:
+                        continue
+                    name = object_content.propSet[0].val
+                    if trace_objects:
+                        self.logger.debug('Indexing object "%s"', name)
+                    for group, index in indexes.items():
+                        if isinstance(object_content.obj, group):
+                            # Keep the first object found with a name, as a linear search would
+                            index.setdefault(name, object_content.obj)
+                if not result.token:
+                    break
+                result = collector.ContinueRetrievePropertiesEx(result.token)
+        finally:
+            container_view.Destroy()
+        indexed_at = time.monotonic()
+        for group, index in indexes.items():
+            self.object_index[(id(self.connection_obj), group, container)] = index
+            self.object_index_time[(id(self.connection_obj), group, container)] = indexed_at
+
+    def __get_object_index(self, obj_type, container=None):
+        """
+        To get name to object reference index of obj_type, building it the first time only
+        Args:
+            obj_type:       (obj): ESXHost object type
+            container:      (obj): Container to search in, Default is None for root folder
+        Returns:
+            dict:           Object reference by object name
+        """
+        index_key = (id(self.connection_obj), tuple(obj_type), container)
+        if index_key not in self.object_index:
+            self.__index_objects([tuple(obj_type)], container)
+        return self.object_index.get(index_key, {})
 
-    def get_obj(self, obj_name, obj_type):
+    def index_objects(self, obj_types, container=None):
+        """
+        To index objects of several types at once, so following get_obj calls are answered from the index
+        Args:
+            obj_types:      (list): ESXHost object types
+            container:      (obj): Container to search in, Default is None for root folder
+        """
+        self.__index_objects([(obj_type,) for obj_type in obj_types], container)
+
+    def collect_properties(self, objs, obj_type, path_set):
+        """
+        To retrieve properties of several objects in a single round trip, instead of one per attribute access
+        Args:
+            objs:           (list): ESXHost object references
+            obj_type:       (obj): ESXHost object type, common to all objects
+            path_set:       (list): Property paths to retrieve
+        Returns:
+            dict:           Property values by path, by object reference
+        """
+        from pyVmomi import vmodl
+        if not objs:
+            return {}
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=obj) for obj in objs],
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=list(path_set))])
+        result = self.connection_obj.content.propertyCollector.RetrieveContents([filter_spec])
+        return dict((object_content.obj, dict((prop.name, prop.val) for prop in object_content.propSet))
+                    for object_content in result or [])
+
+    def get_obj(self, obj_name, obj_type, container=None):
         """
         Find an object in ESXHost by it's obj_name and obj_type
+        Objects are looked up in an index of obj_type which is shared by every ESXHost object of the same connection.
+        When the name is missing from an index older than INDEX_MAX_AGE_SECONDS, the index is built again once.
+        Pass the narrowest known container, a smaller container has fewer names to retrieve.
         Args:
             obj_type:       (obj): ESXHost object type
             obj_name:       (str): ESXHost object name in string format
+            container:      (obj): Container to search in, Default is None for root folder
         Returns:
             obj:            ESXHost object reference
         """
-        content = self.connection_obj.content
-        obj_list = content.viewManager.CreateContainerView(content.rootFolder, obj_type, True).view
-        for obj in obj_list:
-            sys.stdout.write('Checking object "{0}"                      \r'.format(obj.name))
-            if obj.name == obj_name:
-                self.logger.info('Found object {0}'.format(self.get_success_message(obj.name)))
-                return obj
-            else:
-                sys.stdout.flush()
-        return None
+        found_obj = self.__get_object_index(obj_type, container).get(obj_name)
+        index_key = (id(self.connection_obj), tuple(obj_type), container)
+        if found_obj is None and \
+                time.monotonic() - self.object_index_time.get(index_key, 0) > self.INDEX_MAX_AGE_SECONDS:
+            self.logger.debug('Object "%s" not found in index, indexing again', obj_name)
+            self.object_index.pop(index_key, None)
+            found_obj = self.__get_object_index(obj_type, container).get(obj_name)
+        if found_obj and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('Found object %s', self.get_success_message(obj_name))
+        return found_obj
+
+    def invalidate_cache(self, obj_type=None):
+        """
+        To drop indexed objects of this connection, so they will be retrieved again on next lookup
+        Call it after creating or deleting objects
+        Args:
+            obj_type:       (obj): ESXHost object type to drop, Default is None to drop every type
+        """
+        for index_key in list(self.object_index):
+            if index_key[0] == id(self.connection_obj) and (obj_type is None or index_key[1] == tuple(obj_type)):
+                self.object_index.pop(index_key, None)
+
+    def __wait_for_task(self, task_obj, vm_name):
+        """
+        Wait until a task has finished, showing a progress bar while it is running
+        Task changes are pushed by the server to the task waiter of the connection instead of being polled,
+        so tasks can be waited for from several threads at once.
+        The first update holds every watched property, so finished tasks return without waiting.
+        The progress bar is shown for tasks waited for from the main thread only.
+        Args:
+            task_obj:       (obj): ESXHost task object
+            vm_name:        (str): Virtual Machine Name
+        Returns:
+            dict:           Last value of every watched task property
+        """
+        from pyVmomi import vim
+        bar = None
+        show_bar = threading.current_thread().name == 'MainThread'
+        task_waiter = self.__get_task_waiter()
+        property_filter, updates = task_waiter.watch(task_obj)
+        task_info = {}
+        description_id = None
+        state = None
+        progress = None
+        try:
+            while state not in (vim.TaskInfo.State.success, vim.TaskInfo.State.error):
+                changes = updates.get()
+                if isinstance(changes, Exception):
+                    raise changes
+                task_info.update(changes)
+                if description_id is None:
+                    description_id = task_info.get('info.descriptionId')
+                    self.logger.debug('%s - Checking %s task', vm_name, description_id)
+                previous_state, state = state, task_info.get('info.state')
+                previous_progress, progress = progress, task_info.get('info.progress')
+                if progress is not None and progress != previous_progress:
+                    self.logger.debug('%s - %s task progress %s%%', vm_name, description_id, progress)
+                if state == vim.TaskInfo.State.running and show_bar:
+                    if not bar:
+                        import progressbar
+                        widgets = [
+                            '{0} - {1}: '.format(self.get_success_message(vm_name), description_id),
+                            progressbar.Percentage(),
+                            ' | ', progressbar.ETA()]
+                        bar = progressbar.ProgressBar(widgets=widgets, max_value=100)
+                        bar.start()
+                    bar.update(progress or 0)
+                elif state == vim.TaskInfo.State.queued and previous_state != state:
+                    self.logger.warning('%s - %s task is queued', vm_name, description_id)
+        finally:
+            task_waiter.unwatch(property_filter)
+        if bar:
+            bar.finish()
+        return task_info
+
+    def __get_task_waiter(self):
+        """
+        To get the task waiter of this connection, starting it the first time or after it has failed
+        Returns:
+            obj:            Task waiter
+        """
+        with self.connection_lock:
+            task_waiter = self.task_waiters.get(id(self.connection_obj))
+            if task_waiter is None or task_waiter.failure:
+                task_waiter = _TaskWaiter(self.connection_obj, self.TASK_WAIT_SECONDS, self.logger)
+                self.task_waiters[id(self.connection_obj)] = task_waiter
+            return task_waiter
 
     def task_progress(self, task_obj, vm_name):
         """
         Get the real time progress of a task from ESXHost
+        Returns at once if the task has already finished
         Args:
             task_obj:       (obj): ESXHost task object
             vm_name:        (str): Virtual Machine Name
         Returns:
             obj:            Virtual Machine object of a finished task
         """
-        self.logger.info('{0} - Checking task for completion. This might take a while'.format(vm_name))
-        self.logger.debug('{0} - Checking {1} task'.format(vm_name, task_obj.info.descriptionId))
-        widgets = [
-            '{0}{1}{2} - {3}: '.format("\x1b[6;30;42m", vm_name, "\x1b[0m", task_obj.info.descriptionId),
-            progressbar.Percentage(),
-            ' | ', progressbar.ETA()]
-        while True:
-            if task_obj.info.state == vim.TaskInfo.State.success:
-                self.logger.info(
-                    '{0} - {1} task is done'.format(vm_name, self.get_success_message(task_obj.info.descriptionId)))
-                vm_obj = task_obj.info.result
-                break
-            elif task_obj.info.state == vim.TaskInfo.State.running:
-                with progressbar.ProgressBar(widgets=widgets, max_value=100) as bar:
-                    bar.start()
-                    bar.update(0)
-                    while task_obj.info.state == vim.TaskInfo.State.running:
-                        time.sleep(1)
-                        bar.update(task_obj.info.progress)
-            elif task_obj.info.state == vim.TaskInfo.State.queued:
-                self.logger.warning('{0} - {1} task is queued'.format(vm_name, task_obj.info.descriptionId))
-            elif task_obj.info.state == vim.TaskInfo.State.error:
-                if task_obj.info.error.msg:
-                    self.logger.error('{0} - {1} task has quit with error: {2}'.format(
-                        vm_name, self.get_failure_message(task_obj.info.descriptionId), task_obj.info.error.msg))
+        return self.wait_for_task(task_obj, vm_name)[1]
+
+    def wait_for_task(self, task_obj, vm_name):
+        """
+        Wait for a task like task_progress, telling apart success from failure for tasks without result
+        Args:
+            task_obj:       (obj): ESXHost task object
+            vm_name:        (str): Virtual Machine Name
+        Returns:
+            tuple:          (True if the task succeeded, result of the task or None)
+        """
+        from pyVmomi import vim
+        self.logger.info('%s - Checking task for completion. This might take a while', vm_name)
+        task_info = self.__wait_for_task(task_obj, vm_name)
+        description_id = task_info.get('info.descriptionId')
+        state = task_info.get('info.state')
+        task_error = task_info.get('info.error')
+        task_result = task_info.get('info.result')
+        if state == vim.TaskInfo.State.success:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info('%s - %s task is done', vm_name, self.get_success_message(description_id))
+            vm_obj = task_result
+        else:
+            if self.logger.isEnabledFor(logging.ERROR):
+                if task_error and task_error.msg:
+                    self.logger.error('%s - %s task has quit with error: %s',
+                                      vm_name, self.get_failure_message(description_id), task_error.msg)
                 else:
-                    self.logger.error(
-                        '{0} - {1} task has quit with cancelation'.format(vm_name, self.get_failure_message(
-                            task_obj.info.descriptionId)))
-                vm_obj = None
-                break
-            else:
-                vm_obj = None
-                break
-        return vm_obj
+                    self.logger.error('%s - %s task has quit with cancelation',
+                                      vm_name, self.get_failure_message(description_id))
+            vm_obj = None
+        return state == vim.TaskInfo.State.success, vm_obj
+
+    @classmethod
+    def keep_alive(cls):
+        """
+        To keep pooled sessions from timing out while they are idle
+        Runs forever on a daemon thread started with the first connection
+        """
+        while True:
+            time.sleep(cls.KEEPALIVE_SECONDS)
+            with cls.connection_lock:
+                pooled = list(cls.connection_pool.items())
+            for (host, port, username), (connection_obj, logger) in pooled:
+                try:
+                    connection_obj.CurrentTime()
+                except Exception as exception:
+                    logger.warning('Keepalive to host %s:%s failed: %s', host, port, exception)
 
-    def __del__(self):
+    @classmethod
+    def disconnect_all(cls):
         """
-        Magic method to disconnect from ESXHost
+        To disconnect every pooled connection
         This will be called automatically at exit.
         """
-        if self.connection_obj:
-            self.logger.info('Disconnecting from host {0}:{1}'.format(self.host, self.port))
-            Disconnect(self.connection_obj)
+        from pyVim.connect import Disconnect
+        with cls.connection_lock:
+            for (host, port, username), (connection_obj, logger) in list(cls.connection_pool.items()):
+                logger.info('Disconnecting from host %s:%s', host, port)
+                Disconnect(connection_obj)
+            cls.connection_pool.clear()
+            cls.object_index.clear()
+            cls.object_index_time.clear()
+            cls.task_waiters.clear()
+
+
+atexit.register(ESXHost.disconnect_all)
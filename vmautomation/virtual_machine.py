@@ -1,7 +1,19 @@
 #!/usr/bin/env python
 
+import copy
+import logging
+import operator
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional
+
 from pyVmomi import vim, vmodl
-from host import ESXHost
+from host import ESXHost, FailedToConnect
 
 
 class VirtualMachineNotFound(Exception):
@@ -10,7 +22,7 @@ class VirtualMachineNotFound(Exception):
     """
 
     def __init__(self, msg="Virtual Machine Not Found"):
-        super(VirtualMachineNotFound, self).__init__(msg)
+        super().__init__(msg)
 
 class VirtualMachineCreationFailure(Exception):
     """
@@ -18,7 +30,7 @@ class VirtualMachineCreationFailure(Exception):
     """
 
     def __init__(self, msg="Virtual Machine Creation Failure Exception"):
-        super(VirtualMachineCreationFailure, self).__init__(msg)
+        super().__init__(msg)
 
 
 class VirtualMachineCloningFailure(Exception):
@@ -27,7 +39,7 @@ class VirtualMachineCloningFailure(Exception):
     """
 
     def __init__(self, msg="Virtual Machine Cloning Failure Exception"):
-        super(VirtualMachineCloningFailure, self).__init__(msg)
+        super().__init__(msg)
 
 
 class VirtualMachineAlreadyExist(Exception):
@@ -36,7 +48,7 @@ class VirtualMachineAlreadyExist(Exception):
     """
 
     def __init__(self, msg="Virtual Machine Already Exist"):
-        super(VirtualMachineAlreadyExist, self).__init__(msg)
+        super().__init__(msg)
 
 
 class ResourcePoolNotFound(Exception):
@@ -45,7 +57,7 @@ class ResourcePoolNotFound(Exception):
     """
 
     def __init__(self, msg="Resource Pool Not Found"):
-        super(ResourcePoolNotFound, self).__init__(msg)
+        super().__init__(msg)
 
 
 class TemplateNotFound(Exception):
@@ -54,7 +66,7 @@ class TemplateNotFound(Exception):
     """
 
     def __init__(self, msg="Template Not Found"):
-        super(TemplateNotFound, self).__init__(msg)
+        super().__init__(msg)
 
 
 class DatacenterNotFound(Exception):
@@ -63,7 +75,7 @@ class DatacenterNotFound(Exception):
     """
 
     def __init__(self, msg="Datacenter Not Found"):
-        super(DatacenterNotFound, self).__init__(msg)
+        super().__init__(msg)
 
 
 class DatastoreNotFound(Exception):
@@ -72,7 +84,7 @@ class DatastoreNotFound(Exception):
     """
 
     def __init__(self, msg="Datastore Not Found"):
-        super(DatastoreNotFound, self).__init__(msg)
+        super().__init__(msg)
 
 
 class FolderNotFound(Exception):
@@ -81,15 +93,96 @@ class FolderNotFound(Exception):
     """
 
     def __init__(self, msg="Folder Not Found"):
-        super(FolderNotFound, self).__init__(msg)
+        super().__init__(msg)
+
+
+class NetworkNotFound(Exception):
+    """
+    Network Not Found Exception
+    """
+
+    def __init__(self, msg="Network Not Found"):
+        super().__init__(msg)
+
+
+# Log messages shared by several virtual machine operations
+_VM_NOT_FOUND = '%s - Virtual Machine (%s) not found'
+_VM_ALREADY_EXIST = '%s - Virtual Machine (%s) already exist'
+
+# Device change operations
+_OPERATION_ADD = vim.vm.device.VirtualDeviceSpec.Operation.add
+_OPERATION_EDIT = vim.vm.device.VirtualDeviceSpec.Operation.edit
+_OPERATION_REMOVE = vim.vm.device.VirtualDeviceSpec.Operation.remove
+
+# Config spec of new virtual machines, copied for every creation as building a ConfigSpec sets all of its fields
+_CONFIG_SPEC_TEMPLATE = vim.vm.ConfigSpec(annotation="Virtual Machine for Continuous Integration")
+# List fields of the config spec, given fresh lists on every copy so that specs never share them with the template
+_CONFIG_SPEC_LIST_FIELDS = tuple((prop.name, prop.type) for prop in vim.vm.ConfigSpec._GetPropertyList()
+                                 if issubclass(prop.type, list))
+
+
+def _group_by_type(devices):
+    """
+    To group devices under their own type and every base type, so a kind of device is found with a dict lookup
+    Args:
+        devices:            (list): Virtual devices
+    Return:
+        (dict):             Devices by type
+    """
+    by_type = defaultdict(list)
+    for dev in devices:
+        for dev_type in type(dev).__mro__:
+            by_type[dev_type].append(dev)
+    return by_type
+
+
+def _build_vmx_file(datastore_name, vm_name):
+    """
+    To build files info of a new virtual machine
+    Args:
+        datastore_name:     (str): Datastore name
+        vm_name:            (str): Virtual machine name
+    Return:
+        (obj):              Virtual machine files info
+    """
+    return vim.vm.FileInfo(vmPathName=f"[{datastore_name}] {vm_name}/{vm_name}.vmx")
+
+
+@dataclass(frozen=True)
+class VMInfo:
+    """
+    Virtual Machine information holding serializable values only
+    Managed objects are given by name, so it can be passed to orjson or dataclasses.asdict as is
+    """
+    host: str
+    port: int
+    username: str
+    vm_name: str
+    vm_id: Optional[str] = None
+    datacenter: Optional[str] = None
+    datastore: Optional[str] = None
+    resource_pool: Optional[str] = None
+    folder: Optional[str] = None
+    memory_mb: Optional[int] = None
+    num_cpus: Optional[int] = None
 
 
 class VirtualMachine(ESXHost):
     """
     Virtual Machine class to manage Virtual machines/Template from a ESXHost
     """
+    __slots__ = ('vm_name', 'vm_obj', 'template_obj', 'resource_pool_obj', 'datastore_obj', 'datacenter_obj',
+                 'folder_obj', 'relocate_spec', 'memory_mb', 'num_cpus', '_vm_obj_stale', '_batched_changes',
+                 '_device_cache_version', '_temporary_key', '_devices', '_by_type', '_nics_by_label', '_clone_spec',
+                 '_object_names', '_cached_view', '_str_cache')
+    # Spec adding the SCSI controller of the first hard drive, built once and copied for every use
+    _scsi_controller_spec = None
+    _scsi_controller_lock = threading.Lock()
+    # vSphere limits checked before creating a virtual machine; memory is given in multiples of 4 MB
+    MAX_NUM_CPUS = 768
+    MEMORY_MB_GRANULARITY = 4
 
-    def __init__(self, host, username, password, port, logger, ssl_check, vm_name):
+    def __init__(self, host, username, password, port, logger, ssl_check, vm_name, connection=None):
         """
         Constructor for VirtualMachine
         Args:
@@ -100,8 +193,9 @@ class VirtualMachine(ESXHost):
             logger:     (obj): Logger object to manage logging
             ssl_check:  (bool): False to disable SSL Check and True to enable it
             vm_name:    (str):  Virtual machine name which will be automated
+            connection: (obj):  Connected ESXHost object to share instead of connecting, Default is None
         """
-        super(VirtualMachine, self).__init__(host, username, password, port, logger, ssl_check)
+        super().__init__(host, username, password, port, logger, ssl_check, connection=connection)
         self.vm_name = vm_name
         self.vm_obj = None
         self.template_obj = None
@@ -109,6 +203,20 @@ class VirtualMachine(ESXHost):
         self.datastore_obj = None
         self.datacenter_obj = None
         self.folder_obj = None
+        self.relocate_spec = None
+        self.memory_mb = None
+        self.num_cpus = None
+        # True until vm_obj has been looked up, or after the virtual machine has been deleted
+        self._vm_obj_stale = True
+        self._batched_changes = None
+        self._device_cache_version = 0
+        # Last negative key given to an added device, keys of devices added by one reconfigure must differ
+        self._temporary_key = 0
+        # Built on first clone and reused until relocate spec or template changes
+        self._clone_spec = None
+        # Names of datacenter, datastore, resource pool and folder objects, so they aren't retrieved per access
+        self._object_names = {}
+        self.__invalidate_device_cache()
 
     # All private methods to configure virtual machine
     def __is_vm_exist(self):
@@ -120,15 +228,156 @@ class VirtualMachine(ESXHost):
         else:
             return False
 
+    def __require_vm_obj(self):
+        """
+        To make sure vm_obj is set, looking it up only when it is stale
+        Raise:
+            VirtualMachineNotFound Exception
+        """
+        if self._vm_obj_stale:
+            self.set_vm_obj()
+        if not self.vm_obj:
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error(_VM_NOT_FOUND, self.vm_name, self.get_failure_message(self.vm_name))
+            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
+
     def __set_relocate_spec(self):
         """
         To set relocate specification
         This will be called whenever datastore_obj or resource_pool_obj has been changed
         """
-        self.logger.info("{0} - creating relocate spec for VM {0}".format(self.vm_name))
+        self.logger.info('%s - creating relocate spec for VM %s', self.vm_name, self.vm_name)
         self.relocate_spec = vim.vm.RelocateSpec()
         self.relocate_spec.pool = self.resource_pool_obj
         self.relocate_spec.datastore = self.datastore_obj
+        self._clone_spec = None
+
+    def __remember_object_name(self, obj, name):
+        """
+        To keep the name an object has been found by
+        Args:
+            obj:        (obj): ESXHost object reference or None
+            name:       (str): Object name
+        """
+        if obj is not None:
+            # Interned, as many virtual machine objects usually share a few datastore, pool and folder names
+            self._object_names[obj] = sys.intern(name)
+
+    def __prefetch_object_names(self):
+        """
+        To retrieve names of datacenter, datastore, resource pool and folder objects in a single round trip
+        Only objects whose name isn't known yet are retrieved
+        """
+        missing_objs = [obj for obj in (self.datacenter_obj, self.datastore_obj, self.resource_pool_obj,
+                                        self.folder_obj) if obj is not None and obj not in self._object_names]
+        if not missing_objs:
+            return
+        self.logger.debug('%s - Retrieving names of %s objects', self.vm_name, len(missing_objs))
+        for obj, properties in self.collect_properties(missing_objs, vim.ManagedEntity, ['name']).items():
+            name = properties.get('name')
+            self._object_names[obj] = sys.intern(name) if name else name
+
+    def __get_object_label(self, obj):
+        """
+        To get name of an object for logging, falling back to its managed object id instead of retrieving the name
+        Args:
+            obj:        (obj): ESXHost object reference
+        Return:
+            (str):      Object name or managed object id
+        """
+        return self._object_names.get(obj) or obj._moId
+
+    def __get_datastore_name(self):
+        """
+        To get name of datastore object, retrieving it only the first time
+        Return:
+            (str):      Datastore name
+        """
+        if self.datastore_obj not in self._object_names:
+            self.__prefetch_object_names()
+        return self._object_names[self.datastore_obj]
+
+    def __invalidate_device_cache(self):
+        """
+        To drop the cached devices of virtual machine
+        This will be called whenever vm_obj has been changed or reconfigured
+        """
+        self._devices = None
+        self._by_type = None
+        self._nics_by_label = None
+        self._device_cache_version += 1
+
+    def __refresh_device_cache(self):
+        """
+        To fetch all devices of virtual machine in a single round trip and index them by kind
+        Devices are kept until the cache is invalidated
+        """
+        self.logger.debug('%s - Retrieving virtual machine devices', self.vm_name)
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=self.vm_obj)],
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=vim.VirtualMachine,
+                                                                pathSet=['config.hardware.device'])])
+        result = self.connection_obj.content.propertyCollector.RetrieveContents([filter_spec])
+        self._devices = list(result[0].propSet[0].val) if result and result[0].propSet else []
+        self.__index_devices()
+
+    def __index_devices(self):
+        """
+        To index cached devices by kind
+        """
+        self._by_type = _group_by_type(self._devices)
+        self._nics_by_label = dict((dev.deviceInfo.label, dev)
+                                   for dev in self._by_type.get(vim.vm.device.VirtualEthernetCard, []))
+
+    def __apply_device_changes(self, vm_device_changes):
+        """
+        To apply device changes of a successful reconfigure to the cached devices, instead of fetching them again
+        Added disks on an existing controller, edits and removals are applied. Other added devices get their key,
+        unit number or label from the server, so the cache is dropped for them.
+        Args:
+            vm_device_changes:      (list): Applied virtual device specs
+        """
+        if self._devices is None:
+            return
+        devices_by_key = dict((dev.key, dev) for dev in self._devices)
+        for change in vm_device_changes:
+            device = change.device
+            if change.operation == _OPERATION_ADD and isinstance(device, vim.vm.device.VirtualDisk) \
+                    and device.controllerKey in devices_by_key:
+                self._devices.append(device)
+            elif change.operation == _OPERATION_EDIT and device.key in devices_by_key:
+                self._devices[self._devices.index(devices_by_key[device.key])] = device
+            elif change.operation == _OPERATION_REMOVE:
+                self._devices = [dev for dev in self._devices if dev.key != device.key]
+            else:
+                self.__invalidate_device_cache()
+                return
+        self.__index_devices()
+        self._device_cache_version += 1
+        self.logger.debug('%s - Applied device changes to device cache version %s', self.vm_name,
+                          self._device_cache_version)
+
+    def __get_devices(self):
+        """
+        To get cached devices of virtual machine, fetching them if needed
+        Devices added by a pending reconfigure batch are included
+        Return:
+            (list):             All virtual devices of virtual machine
+        """
+        if self._devices is None:
+            self.__refresh_device_cache()
+        return self._devices + self.__get_pending_devices()
+
+    def __get_pending_devices(self):
+        """
+        To get devices added by the pending reconfigure batch
+        Return:
+            (list):             Virtual devices not yet added to virtual machine
+        """
+        if not self._batched_changes:
+            return []
+        return [change.device for change in self._batched_changes
+                if change.operation == _OPERATION_ADD]
 
     def __get_virtual_nic_device(self, nic_hw_name):
         """
@@ -138,16 +387,10 @@ class VirtualMachine(ESXHost):
         Return:
             (obj):              Virtual Ethernet Card Object
         """
-        self.logger.info('{0} - Trying to get Virtual NIC Device: {1}'.format(self.vm_name, nic_hw_name))
-        virtual_nic_device = None
-        if not self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) not found'.format(self.vm_name, self.get_failure_message(self.vm_name)))
-            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
-        for dev in self.vm_obj.config.hardware.device:
-            if isinstance(dev, vim.vm.device.VirtualEthernetCard) \
-                    and dev.deviceInfo.label == nic_hw_name:
-                virtual_nic_device = dev
+        self.logger.info('%s - Trying to get Virtual NIC Device: %s', self.vm_name, nic_hw_name)
+        self.__require_vm_obj()
+        self.__get_devices()
+        virtual_nic_device = self._nics_by_label.get(nic_hw_name)
         if not virtual_nic_device:
             raise RuntimeError('Virtual NIC:{0} not found.'.format(nic_hw_name))
         return virtual_nic_device
@@ -158,15 +401,27 @@ class VirtualMachine(ESXHost):
         Return:
             (obj):              Free IDE Controller object
         """
-        self.logger.debug("{0} - Getting free IDE Controller".format(self.vm_name))
-        for dev in self.vm_obj.config.hardware.device:
-            if isinstance(dev, vim.vm.device.VirtualIDEController):
-                # If there are less than 2 devices attached, we can use it.
-                if len(dev.device) < 2:
-                    return dev
-        self.logger.warning("{0} - Couldn't get free IDE controller".format(self.vm_name))
+        self.logger.debug('%s - Getting free IDE Controller', self.vm_name)
+        self.__get_devices()
+        pending_devices = self.__get_pending_devices()
+        for dev in self._by_type.get(vim.vm.device.VirtualIDEController, []):
+            # If there are less than 2 devices attached, we can use it.
+            pending_count = sum(1 for pending_dev in pending_devices if pending_dev.controllerKey == dev.key)
+            if len(dev.device) + pending_count < 2:
+                return dev
+        self.logger.warning("%s - Couldn't get free IDE controller", self.vm_name)
         return None
 
+    def __get_temporary_key(self):
+        """
+        To get a key for a device to add, unique within the reconfigure task adding it
+        The server replaces it, but devices added together refer to each other by it
+        Return:
+            (int):              Negative device key
+        """
+        self._temporary_key -= 1
+        return self._temporary_key
+
     def __reconfigure_vm(self, vm_spec=None, vm_device_changes=None):
         """
         Reconfigure Virtual Machine with new spec and changed device spec
@@ -174,23 +429,64 @@ class VirtualMachine(ESXHost):
             vm_spec:                (obj): Virtual Machine spec. Default is None
             vm_device_changes:      (obj): Changed virtual device specs
         """
-        self.logger.info('{0} - Reconfiguring virtual machine'.format(self.vm_name))
         if vm_spec:
             vm_device_changes = [vm_spec]
+        if self._batched_changes is not None:
+            self.logger.debug('%s - Adding device changes to reconfigure batch', self.vm_name)
+            for change in vm_device_changes:
+                if change.operation == _OPERATION_EDIT:
+                    # Later edit of the same device replaces the earlier one
+                    self._batched_changes = [
+                        batched for batched in self._batched_changes
+                        if batched.operation != _OPERATION_EDIT
+                        or batched.device.key != change.device.key]
+                self._batched_changes.append(change)
+            return
+        self.logger.info('%s - Reconfiguring virtual machine', self.vm_name)
         spec = vim.vm.ConfigSpec()
         spec.deviceChange = vm_device_changes
         reconfigure_task_obj = self.vm_obj.ReconfigVM_Task(spec=spec)
-        self.task_progress(reconfigure_task_obj, self.vm_name)
+        succeeded = self.wait_for_task(reconfigure_task_obj, self.vm_name)[0]
+        if succeeded:
+            self.__apply_device_changes(vm_device_changes)
+        else:
+            self.__invalidate_device_cache()
 
     def __get_clone_spec(self):
         """
         Create and Return virtual machine cloning operation spec
+        The spec is built once and reused until relocate spec or template object is changed
         Return:
             VM Cloning spec:              VM Cloning operation spec
         """
-        self.logger.debug('{0} - Creating clone spec'.format(self.vm_name))
-        clone_spec = vim.vm.CloneSpec(powerOn=False, template=False, location=self.relocate_spec)
-        return clone_spec
+        if self._clone_spec is None:
+            self.logger.debug('%s - Creating clone spec', self.vm_name)
+            self._clone_spec = vim.vm.CloneSpec(powerOn=False, template=False, location=self.relocate_spec)
+        return self._clone_spec
+
+    def __get_scsi_controller_spec(self):
+        """
+        Get spec to add a SCSI controller for the first hard drive
+        Every field is constant, so a prototype is built once and copied
+        Return:
+            scsi_controller_spec:        Spec for SCSI controller add operation
+        """
+        with self._scsi_controller_lock:
+            if VirtualMachine._scsi_controller_spec is None:
+                scsi_controller = vim.vm.device.VirtualLsiLogicController()
+                scsi_controller.deviceInfo = vim.Description()
+                scsi_controller.slotInfo = vim.vm.device.VirtualDevice.PciBusSlotInfo(pciSlotNumber=16)
+                scsi_controller.controllerKey = 100
+                scsi_controller.unitNumber = 3
+                scsi_controller.busNumber = 0
+                scsi_controller.hotAddRemove = True
+                scsi_controller.sharedBus = 'noSharing'
+                scsi_controller.scsiCtlrUnitNumber = 7
+                VirtualMachine._scsi_controller_spec = vim.vm.device.VirtualDeviceSpec(operation=_OPERATION_ADD,
+                                                                                       device=scsi_controller)
+        scsi_controller_spec = copy.copy(VirtualMachine._scsi_controller_spec)
+        scsi_controller_spec.device = copy.copy(scsi_controller_spec.device)
+        return scsi_controller_spec
 
     def __get_disk_spec(self, unit_number, controller, disk_label, capacity_in_KB):
         """
@@ -204,20 +500,21 @@ class VirtualMachine(ESXHost):
         Return:
             vm_disk_spec:                Spec for disk add operation
         """
-        self.logger.info('{0} - Getting hard drive spec for {1}'.format(self.vm_name, disk_label))
+        self.logger.info('%s - Getting hard drive spec for %s', self.vm_name, disk_label)
         disk_spec = vim.vm.device.VirtualDeviceSpec()
         disk_spec.fileOperation = "create"
-        disk_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
-        disk_spec.device = vim.vm.device.VirtualDisk()
-        disk_spec.device.backing = \
-            vim.vm.device.VirtualDisk.FlatVer2BackingInfo()
-        disk_spec.device.backing.thinProvisioned = True
-        disk_spec.device.backing.diskMode = 'persistent'
-        disk_spec.device.backing.fileName = '[{0}] {1}/{1}-{2}.vmdk'.format(self.datastore_obj.name, self.vm_name,
-                                                                            disk_label)
-        disk_spec.device.unitNumber = unit_number
-        disk_spec.device.capacityInKB = long(capacity_in_KB)
-        disk_spec.device.controllerKey = controller.key
+        disk_spec.operation = _OPERATION_ADD
+        backing = vim.vm.device.VirtualDisk.FlatVer2BackingInfo()
+        backing.thinProvisioned = True
+        backing.diskMode = 'persistent'
+        backing.fileName = f'[{self.__get_datastore_name()}] {self.vm_name}/{self.vm_name}-{disk_label}.vmdk'
+        virtual_disk = vim.vm.device.VirtualDisk()
+        virtual_disk.backing = backing
+        virtual_disk.unitNumber = unit_number
+        virtual_disk.capacityInKB = int(capacity_in_KB)
+        virtual_disk.controllerKey = controller.key
+        virtual_disk.key = self.__get_temporary_key()
+        disk_spec.device = virtual_disk
         return disk_spec
 
     # Helper methods to set different VM Objects
@@ -225,13 +522,15 @@ class VirtualMachine(ESXHost):
         """
         To set virtual machine object
         """
-        self.logger.info("{0} - Setting VM object of ({0})".format(self.vm_name))
+        self.logger.info('%s - Setting VM object of (%s)', self.vm_name, self.vm_name)
         self.vm_obj = self.get_obj(self.vm_name, [vim.VirtualMachine])
+        self._vm_obj_stale = self.vm_obj is None
+        self.__invalidate_device_cache()
         if not self.vm_obj:
-            self.logger.warning(
-                '{0} - Unable to find VM {1}'.format(self.vm_name, self.get_failure_message(self.vm_name)))
+            if self.logger.isEnabledFor(logging.WARNING):
+                self.logger.warning('%s - Unable to find VM %s', self.vm_name, self.get_failure_message(self.vm_name))
         else:
-            self.logger.info('{0} - Virtual Machine ({0}) found'.format(self.vm_name))
+            self.logger.info('%s - Virtual Machine (%s) found', self.vm_name, self.vm_name)
 
     def set_template_obj(self, template_name):
         """
@@ -240,14 +539,16 @@ class VirtualMachine(ESXHost):
         Args:
             template_name:       (str): Template Name
         """
-        self.logger.info('{0} - Setting template object of {1}'.format(self.vm_name, template_name))
+        self.logger.info('%s - Setting template object of %s', self.vm_name, template_name)
         self.template_obj = self.get_obj(template_name, [vim.VirtualMachine])
+        self._clone_spec = None
         if not self.template_obj:
-            self.logger.error(
-                '{0} - Unable to find template {1}'.format(self.vm_name, self.get_failure_message(template_name)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find template %s',
+                                  self.vm_name, self.get_failure_message(template_name))
             raise TemplateNotFound(msg="Template: {0} not found".format(template_name))
         else:
-            self.logger.info('%s - Template %s found' % (self.vm_name, template_name))
+            self.logger.info('%s - Template %s found', self.vm_name, template_name)
 
     def set_datacenter_obj(self, datacenter=None):
         """
@@ -256,20 +557,21 @@ class VirtualMachine(ESXHost):
         Args:
             datacenter:       (str): Datacenter Name, Default is None
         """
-        self.logger.info('{0} - Setting Datacenter object'.format(self.vm_name))
+        self.logger.info('%s - Setting Datacenter object', self.vm_name)
         if datacenter:
-            self.logger.debug('{0} - Finding Datacenter: {1}'.format(self.vm_name, datacenter))
+            self.logger.debug('%s - Finding Datacenter: %s', self.vm_name, datacenter)
             self.datacenter_obj = self.get_obj(datacenter, [vim.Datacenter])
+            self.__remember_object_name(self.datacenter_obj, datacenter)
         else:
-            self.logger.debug('{0} - Trying to use rootFolder as Datacenter'.format(self.vm_name))
+            self.logger.debug('%s - Trying to use rootFolder as Datacenter', self.vm_name)
             self.datacenter_obj = self.connection_obj.content.rootFolder.childEntity[0]
         if not self.datacenter_obj:
-            self.logger.error(
-                '{0} - Unable to find Datacenter {1}'.format(self.vm_name, self.get_failure_message(datacenter)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find Datacenter %s',
+                                  self.vm_name, self.get_failure_message(datacenter))
             raise DatacenterNotFound(msg="Datacenter: {0} not found".format(datacenter))
         else:
-            self.logger.info('{0} - Datacenter: {1} found'.format(self.vm_name,
-                                                                  self.datacenter_obj.name))
+            self.logger.info('%s - Datacenter: %s found', self.vm_name, self.__get_object_label(self.datacenter_obj))
 
     def set_datastore_obj(self, datastore=None):
         """
@@ -278,20 +580,20 @@ class VirtualMachine(ESXHost):
         Args:
             datastore:       (str): Datastore Name, Default is None
         """
-        self.logger.info('{0} - Setting Datastore object'.format(self.vm_name))
+        self.logger.info('%s - Setting Datastore object', self.vm_name)
         if datastore:
-            self.logger.debug('{0} - Finding Datastore: {1}'.format(self.vm_name, datastore))
-            self.datastore_obj = self.get_obj(datastore, [vim.Datastore])
+            self.logger.debug('%s - Finding Datastore: %s', self.vm_name, datastore)
+            self.datastore_obj = self.get_obj(datastore, [vim.Datastore], container=self.datacenter_obj)
+            self.__remember_object_name(self.datastore_obj, datastore)
         if self.template_obj and not self.datastore_obj:
-            self.logger.debug('{0} - Getting Template Datastore'.format(self.vm_name))
-            self.datastore_obj = self.get_obj(self.template_obj.datastore[0].info.name, [vim.Datastore])
+            self.logger.debug('%s - Getting Template Datastore', self.vm_name)
+            self.datastore_obj = self.template_obj.datastore[0]
         if not self.datastore_obj:
-            self.logger.error(
-                '{0} - Unable to find Datastore {1}'.format(self.vm_name, self.get_failure_message(datastore)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find Datastore %s', self.vm_name, self.get_failure_message(datastore))
             raise DatastoreNotFound(msg="Datastore: {0} not found".format(datastore))
         else:
-            self.logger.info('{0} - Datastore: {1} found'.format(self.vm_name,
-                                                                 self.datastore_obj.name))
+            self.logger.info('%s - Datastore: %s found', self.vm_name, self.__get_object_label(self.datastore_obj))
             self.__set_relocate_spec()
 
     def set_resource_pool_obj(self, resource_pool=None):
@@ -301,21 +603,23 @@ class VirtualMachine(ESXHost):
         Args:
             resource_pool:       (str): Resource Pool Name, Default is None
         """
-        self.logger.info('{0} - Setting Resource Pool object'.format(self.vm_name))
+        self.logger.info('%s - Setting Resource Pool object', self.vm_name)
         if resource_pool:
-            self.logger.debug('{0} - Finding Resource Pool: {1}'.format(self.vm_name, resource_pool))
-            self.resource_pool_obj = self.get_obj(resource_pool, [vim.ResourcePool])
+            self.logger.debug('%s - Finding Resource Pool: %s', self.vm_name, resource_pool)
+            self.resource_pool_obj = self.get_obj(resource_pool, [vim.ResourcePool], container=self.datacenter_obj)
+            self.__remember_object_name(self.resource_pool_obj, resource_pool)
         else:
-            self.logger.info(
-                '{0} - No resource pool specified thus using the default resource pool.'.format(self.vm_name))
-            self.resource_pool_obj = self.get_obj('Resources', [vim.ResourcePool])
+            self.logger.info('%s - No resource pool specified thus using the default resource pool.', self.vm_name)
+            self.resource_pool_obj = self.get_obj('Resources', [vim.ResourcePool], container=self.datacenter_obj)
+            self.__remember_object_name(self.resource_pool_obj, 'Resources')
         if self.resource_pool_obj is None:
-            self.logger.error(
-                '{0} - Unable to find Resource Pool {1}'.format(self.vm_name,
-                                                                self.get_failure_message(resource_pool)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find Resource Pool %s',
+                                  self.vm_name, self.get_failure_message(resource_pool))
             raise ResourcePoolNotFound(msg="Resource Pool: {0} not found".format(resource_pool))
         else:
-            self.logger.info('{0} - Resource Pool: {1} found'.format(self.vm_name, self.resource_pool_obj.name))
+            self.logger.info('%s - Resource Pool: %s found', self.vm_name,
+                             self.__get_object_label(self.resource_pool_obj))
             self.__set_relocate_spec()
 
     def set_folder_obj(self, folder_name=None):
@@ -325,23 +629,74 @@ class VirtualMachine(ESXHost):
         Args:
             folder_name:       (str): Folder Name, Default is None
         """
-        self.logger.info('{0} - Setting Folder object'.format(self.vm_name))
+        self.logger.info('%s - Setting Folder object', self.vm_name)
         if folder_name:
-            self.logger.debug('{0} - Finding Folder: {1}'.format(self.vm_name, folder_name))
-            self.folder_obj = self.get_obj(folder_name, [vim.Folder])
+            self.logger.debug('%s - Finding Folder: %s', self.vm_name, folder_name)
+            self.folder_obj = self.get_obj(folder_name, [vim.Folder], container=self.datacenter_obj)
+            self.__remember_object_name(self.folder_obj, folder_name)
         elif self.datacenter_obj:
-            self.logger.info(
-                '{0} - Setting folder to datacenter root folder as a datacenter has been defined'.format(self.vm_name))
+            self.logger.info('%s - Setting folder to datacenter root folder as a datacenter has been defined',
+                             self.vm_name)
             self.folder_obj = self.datacenter_obj.vmFolder
         elif self.template_obj:
-            self.logger.info('{0} - Setting folder to template folder as default'.format(self.vm_name))
+            self.logger.info('%s - Setting folder to template folder as default', self.vm_name)
             self.folder_obj = self.template_obj.parent
         if self.folder_obj is None:
-            self.logger.error(
-                '{0} - Unable to find folder {1}'.format(self.vm_name, self.get_failure_message(folder_name)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find folder %s', self.vm_name, self.get_failure_message(folder_name))
             raise FolderNotFound(msg="Folder: {0} not found".format(folder_name))
         else:
-            self.logger.info('{0} - Folder: {1} found'.format(self.vm_name, self.folder_obj.name))
+            self.logger.info('%s - Folder: %s found', self.vm_name, self.__get_object_label(self.folder_obj))
+
+    @contextmanager
+    def reconfigure_batch(self):
+        """
+        To collect device changes of add_* and update_* methods and apply them with a single reconfigure task
+        Changes are discarded along with the cached devices if the block raises, a nested batch joins the outer one
+        Every added device gets its own negative key, so devices added together can refer to each other
+        Usage:
+            with vm.reconfigure_batch():
+                vm.add_hard_disk(...)
+                vm.add_network_card(...)
+        """
+        if self._batched_changes is not None:
+            yield
+            return
+        self._batched_changes = []
+        self._temporary_key = 0
+        try:
+            yield
+            batched_changes = self._batched_changes
+        except BaseException:
+            # update_* methods edit cached devices in place, drop them as those edits are never sent
+            self.__invalidate_device_cache()
+            raise
+        finally:
+            self._batched_changes = None
+        if batched_changes:
+            self.logger.debug('%s - Applying %s batched device changes', self.vm_name, len(batched_changes))
+            self.__reconfigure_vm(vm_device_changes=batched_changes)
+
+    def prepare_clone(self, template_name, datacenter=None, datastore=None, resource_pool=None, folder_name=None):
+        """
+        To set template, datacenter, datastore, resource pool and folder objects for cloning
+        Template and datacenter names are retrieved together, then the names of the other object types
+        are retrieved together from the datacenter only
+        Args:
+            template_name:      (str): Template Name
+            datacenter:         (str): Datacenter Name, Default is None
+            datastore:          (str): Datastore Name, Default is None
+            resource_pool:      (str): Resource Pool Name, Default is None
+            folder_name:        (str): Folder Name, Default is None
+        """
+        self.logger.debug('%s - Preparing objects to clone from template %s', self.vm_name, template_name)
+        self.index_objects([vim.VirtualMachine, vim.Datacenter])
+        self.set_template_obj(template_name)
+        self.set_datacenter_obj(datacenter)
+        self.index_objects([vim.Datastore, vim.ResourcePool, vim.Folder], container=self.datacenter_obj)
+        self.set_datastore_obj(datastore)
+        self.set_resource_pool_obj(resource_pool)
+        self.set_folder_obj(folder_name)
 
     # Add new hardware to virtual machine
     def add_hard_disk(self, disk_label, capacity_in_KB):
@@ -352,40 +707,36 @@ class VirtualMachine(ESXHost):
             disk_label:                 (str): Disk label for new hard drive
             capacity_in_KB:             (int): Hard drive capacity in KB
         """
-        self.logger.info(
-            '{0} - Adding hard drive {1} with size {2} KB'.format(self.vm_name,
-                                                                  self.get_informative_message(disk_label),
-                                                                  capacity_in_KB))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Adding hard drive %s with size %s KB',
+                             self.vm_name, self.get_informative_message(disk_label), capacity_in_KB)
         dev_changes = []
-        controller = None
-        for dev in self.vm_obj.config.hardware.device:
-            if hasattr(dev.backing, 'fileName'):
-                unit_number = int(dev.unitNumber) + 1
-                # unit_number 7 reserved for scsi controller
-                if unit_number == 7:
-                    unit_number += 1
-            if isinstance(dev, vim.vm.device.VirtualSCSIController):
-                controller = dev
+        self.__get_devices()
+        pending_by_type = _group_by_type(self.__get_pending_devices())
+        scsi_ctrls = (self._by_type.get(vim.vm.device.VirtualSCSIController, []) +
+                      pending_by_type.get(vim.vm.device.VirtualSCSIController, []))
+        controller = scsi_ctrls[-1] if scsi_ctrls else None
         if not controller:
-            self.logger.debug('{0} - Adding scsi controller for first hard drive'.format(self.vm_name))
-            scsi_ctr = vim.vm.device.VirtualDeviceSpec()
-            scsi_ctr.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
-            scsi_ctr.device = vim.vm.device.VirtualLsiLogicController()
-            scsi_ctr.device.deviceInfo = vim.Description()
-            scsi_ctr.device.slotInfo = vim.vm.device.VirtualDevice.PciBusSlotInfo()
-            scsi_ctr.device.slotInfo.pciSlotNumber = 16
-            scsi_ctr.device.controllerKey = 100
-            scsi_ctr.device.unitNumber = 3
-            scsi_ctr.device.busNumber = 0
-            scsi_ctr.device.hotAddRemove = True
-            scsi_ctr.device.sharedBus = 'noSharing'
-            scsi_ctr.device.scsiCtlrUnitNumber = 7
+            self.logger.debug('%s - Adding scsi controller for first hard drive', self.vm_name)
+            scsi_ctr = self.__get_scsi_controller_spec()
+            # Set before building the disk spec, so the disk refers to this pending controller
+            scsi_ctr.device.key = self.__get_temporary_key()
             dev_changes.append(scsi_ctr)
             disk_spec = self.__get_disk_spec(unit_number=0, controller=scsi_ctr.device,
                                              disk_label=disk_label, capacity_in_KB=capacity_in_KB)
             dev_changes.append(disk_spec)
             self.__reconfigure_vm(vm_device_changes=dev_changes)
         else:
+            used_units = set(dev.unitNumber for dev in (self._by_type.get(vim.vm.device.VirtualDisk, []) +
+                                                        pending_by_type.get(vim.vm.device.VirtualDisk, []))
+                             if dev.controllerKey == controller.key)
+            # Smallest free unit number, unit_number 7 reserved for scsi controller
+            unit_number = next((unit for unit in range(16) if unit not in used_units and unit != 7), None)
+            if unit_number is None:
+                if self.logger.isEnabledFor(logging.ERROR):
+                    self.logger.error('%s - No free unit number on scsi controller for hard drive %s',
+                                      self.vm_name, self.get_failure_message(disk_label))
+                raise RuntimeError('No free unit number on SCSI controller for hard drive:{0}'.format(disk_label))
             disk_spec = self.__get_disk_spec(unit_number=unit_number, controller=controller,
                                              disk_label=disk_label, capacity_in_KB=capacity_in_KB)
             self.__reconfigure_vm(vm_spec=disk_spec)
@@ -399,13 +750,12 @@ class VirtualMachine(ESXHost):
             iso_file_name:                (str): "[<ISO datastore name>] <iso_file.iso>", default is None
             startConnected:               (bool): Connected from power on, default is False
         """
-        self.logger.info(
-            '{0} - Adding {1} drive with connected({2}) from startup'.format(self.vm_name,
-                                                                             self.get_informative_message("CDROM"),
-                                                                             startConnected))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Adding %s drive with connected(%s) from startup',
+                             self.vm_name, self.get_informative_message("CDROM"), startConnected)
         controller = self.__get_free_ide_controller()
         if iso_file_name:
-            self.logger.info('{0} - Adding ISO {1} to CDROM drive'.format(self.vm_name, iso_file_name))
+            self.logger.info('%s - Adding ISO %s to CDROM drive', self.vm_name, iso_file_name)
             backing = vim.vm.device.VirtualCdrom.IsoBackingInfo(fileName=iso_file_name)
         else:
             backing = vim.vm.device.VirtualCdrom.RemotePassthroughBackingInfo()
@@ -414,11 +764,11 @@ class VirtualMachine(ESXHost):
         connectable.startConnected = startConnected
         virtual_cdrom = vim.vm.device.VirtualCdrom()
         virtual_cdrom.controllerKey = controller.key
-        virtual_cdrom.key = -1
+        virtual_cdrom.key = self.__get_temporary_key()
         virtual_cdrom.connectable = connectable
         virtual_cdrom.backing = backing
         cdrom_spec = vim.vm.device.VirtualDeviceSpec()
-        cdrom_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
+        cdrom_spec.operation = _OPERATION_ADD
         cdrom_spec.device = virtual_cdrom
         self.__reconfigure_vm(vm_spec=cdrom_spec)
 
@@ -434,31 +784,39 @@ class VirtualMachine(ESXHost):
             connected:                       (bool): connected from startup or not, default is True
             summary:                         (str): Network card summary
         """
-        self.logger.info(
-            '{0} - Adding Network Card {1}'.format(self.vm_name, self.get_informative_message(network_label)))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Adding Network Card %s', self.vm_name, self.get_informative_message(network_label))
         nic_spec = vim.vm.device.VirtualDeviceSpec()
-        nic_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
-        nic_spec.device = vim.vm.device.VirtualE1000()
-        nic_spec.device.deviceInfo = vim.Description()
-        nic_spec.device.deviceInfo.summary = summary
-        nic_spec.device.backing = \
-            vim.vm.device.VirtualEthernetCard.NetworkBackingInfo()
-        nic_spec.device.backing.useAutoDetect = False
-        nic_spec.device.backing.network = self.get_obj(network_label, [vim.Network])
-        nic_spec.device.backing.deviceName = network_label
-        nic_spec.device.connectable = vim.vm.device.VirtualDevice.ConnectInfo()
-        nic_spec.device.connectable.startConnected = True
-        nic_spec.device.connectable.allowGuestControl = True
-        nic_spec.device.connectable.connected = connected
-        nic_spec.device.connectable.status = 'untried'
-        nic_spec.device.wakeOnLanEnabled = True
+        nic_spec.operation = _OPERATION_ADD
+        network_obj = self.get_obj(network_label, [vim.Network], container=self.datacenter_obj)
+        if not network_obj:
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Unable to find Network %s',
+                                  self.vm_name, self.get_failure_message(network_label))
+            raise NetworkNotFound(msg="Network: {0} not found".format(network_label))
+        backing = vim.vm.device.VirtualEthernetCard.NetworkBackingInfo()
+        backing.useAutoDetect = False
+        backing.network = network_obj
+        backing.deviceName = network_label
+        connectable = vim.vm.device.VirtualDevice.ConnectInfo()
+        connectable.startConnected = True
+        connectable.allowGuestControl = True
+        connectable.connected = connected
+        connectable.status = 'untried'
+        virtual_nic = vim.vm.device.VirtualE1000()
+        virtual_nic.key = self.__get_temporary_key()
+        virtual_nic.deviceInfo = vim.Description(summary=summary)
+        virtual_nic.backing = backing
+        virtual_nic.connectable = connectable
+        virtual_nic.wakeOnLanEnabled = True
         if mac_address_type == "manual" and mac_address:
-            self.logger.debug('{0} - Adding mac address {1} to {2}'.format(self.vm_name, mac_address, network_label))
-            nic_spec.device.macAddress = mac_address
-            nic_spec.device.addressType = mac_address_type
+            self.logger.debug('%s - Adding mac address %s to %s', self.vm_name, mac_address, network_label)
+            virtual_nic.macAddress = mac_address
+            virtual_nic.addressType = mac_address_type
         else:
-            self.logger.debug('{0} - Using assigned mac address'.format(self.vm_name))
-            nic_spec.device.addressType = 'assigned'
+            self.logger.debug('%s - Using assigned mac address', self.vm_name)
+            virtual_nic.addressType = 'assigned'
+        nic_spec.device = virtual_nic
         self.__reconfigure_vm(vm_spec=nic_spec)
 
     # Update virtual machine's settings
@@ -469,12 +827,12 @@ class VirtualMachine(ESXHost):
             nic_hw_name:                     (str): Network card name
             mac_address:                     (str): Mac address
         """
-        self.logger.info(
-            '{0} - Updating mac address to {1} for {2}'.format(self.vm_name, self.get_informative_message(mac_address),
-                                                               nic_hw_name))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Updating mac address to %s for %s',
+                             self.vm_name, self.get_informative_message(mac_address), nic_hw_name)
         virtual_nic_device = self.__get_virtual_nic_device(nic_hw_name)
         virtual_nic_spec = vim.vm.device.VirtualDeviceSpec()
-        virtual_nic_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.edit
+        virtual_nic_spec.operation = _OPERATION_EDIT
         virtual_nic_spec.device = virtual_nic_device
         virtual_nic_spec.device.key = virtual_nic_device.key
         virtual_nic_spec.device.macAddress = mac_address
@@ -491,11 +849,12 @@ class VirtualMachine(ESXHost):
             nic_hw_name:                     (str): Network card name
             new_network_label:               (str): New Network Label
         """
-        self.logger.info('{0} - Updating network label name to {1}'.format(self.vm_name, self.get_informative_message(
-            new_network_label)))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Updating network label name to %s',
+                             self.vm_name, self.get_informative_message(new_network_label))
         virtual_nic_device = self.__get_virtual_nic_device(nic_hw_name)
         virtual_nic_spec = vim.vm.device.VirtualDeviceSpec()
-        virtual_nic_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.edit
+        virtual_nic_spec.operation = _OPERATION_EDIT
         virtual_nic_spec.device = virtual_nic_device
         virtual_nic_spec.device.backing.deviceName = new_network_label
         self.__reconfigure_vm(vm_spec=virtual_nic_spec)
@@ -507,19 +866,19 @@ class VirtualMachine(ESXHost):
             nic_hw_name:                     (str): Network card name
             connected:                       (bool): Connected from start up or not
         """
-        self.logger.info('{0} - Updating network device status to {1}'.format(self.vm_name,
-                                                                              self.get_informative_message(
-                                                                                  "connected/disconnected")))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info('%s - Updating network device status to %s',
+                             self.vm_name, self.get_informative_message("connected/disconnected"))
         virtual_nic_device = self.__get_virtual_nic_device(nic_hw_name)
         connectable = vim.vm.device.VirtualDevice.ConnectInfo()
         if connected:
-            self.logger.debug('{0} - Updating network device status to connected'.format(self.vm_name))
+            self.logger.debug('%s - Updating network device status to connected', self.vm_name)
         else:
-            self.logger.debug('{0} - Updating network device status to disconnected'.format(self.vm_name))
+            self.logger.debug('%s - Updating network device status to disconnected', self.vm_name)
         connectable.connected = connected
         connectable.startConnected = connected
         virtual_nic_spec = vim.vm.device.VirtualDeviceSpec()
-        virtual_nic_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.edit
+        virtual_nic_spec.operation = _OPERATION_EDIT
         virtual_nic_spec.device = virtual_nic_device
         virtual_nic_spec.device.connectable = connectable
         self.__reconfigure_vm(vm_spec=virtual_nic_spec)
@@ -529,12 +888,8 @@ class VirtualMachine(ESXHost):
         """
         Main method to power on Virtual Machine
         """
-        self.logger.info('{0} - Power On virtual machine'.format(self.vm_name))
-        self.set_vm_obj()
-        if not self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) not found'.format(self.vm_name, self.get_failure_message(self.vm_name)))
-            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
+        self.logger.info('%s - Power On virtual machine', self.vm_name)
+        self.__require_vm_obj()
         power_on_vm_task_obj = self.vm_obj.PowerOn()
         self.task_progress(power_on_vm_task_obj, self.vm_name)
 
@@ -542,12 +897,8 @@ class VirtualMachine(ESXHost):
         """
         Main method to power off Virtual Machine
         """
-        self.logger.info('{0} - Power Off virtual machine'.format(self.vm_name))
-        self.set_vm_obj()
-        if not self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) not found'.format(self.vm_name, self.get_failure_message(self.vm_name)))
-            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
+        self.logger.info('%s - Power Off virtual machine', self.vm_name)
+        self.__require_vm_obj()
         power_off_vm_task_obj = self.vm_obj.PowerOff()
         self.task_progress(power_off_vm_task_obj, self.vm_name)
 
@@ -555,12 +906,8 @@ class VirtualMachine(ESXHost):
         """
         Main method to Reset Virtual Machine
         """
-        self.logger.info('{0} - Resetting virtual machine'.format(self.vm_name))
-        self.set_vm_obj()
-        if not self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) not found'.format(self.vm_name, self.get_failure_message(self.vm_name)))
-            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
+        self.logger.info('%s - Resetting virtual machine', self.vm_name)
+        self.__require_vm_obj()
         reset_vm_task_obj = self.vm_obj.Reset()
         self.task_progress(reset_vm_task_obj, self.vm_name)
 
@@ -568,14 +915,12 @@ class VirtualMachine(ESXHost):
         """
         Main method to delete Virtual Machine
         """
-        self.logger.info('{0} - Deleting virtual machine'.format(self.vm_name))
-        self.set_vm_obj()
-        if not self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) not found'.format(self.vm_name, self.get_failure_message(self.vm_name)))
-            raise VirtualMachineNotFound(msg="VM: {0} not found".format(self.vm_name))
+        self.logger.info('%s - Deleting virtual machine', self.vm_name)
+        self.__require_vm_obj()
         delete_vm_task_obj = self.vm_obj.Destroy()
         self.task_progress(delete_vm_task_obj, self.vm_name)
+        self._vm_obj_stale = True
+        self.invalidate_cache([vim.VirtualMachine])
 
     def clone_from_template(self, template_name):
         """
@@ -583,69 +928,226 @@ class VirtualMachine(ESXHost):
         Args:
             template_name:                     (str): Template Name
         """
-        self.logger.info('{0} - Cloning virtual machine from template ({1})'.format(self.vm_name, template_name))
+        self.logger.info('%s - Cloning virtual machine from template (%s)', self.vm_name, template_name)
         self.set_template_obj(template_name)
-        self.set_vm_obj()
-        clone_spec = self.__get_clone_spec()
-        if self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) already exist'.format(self.vm_name,
-                                                                   self.get_failure_message(self.vm_name)))
+        # Names of all virtual machines are already indexed with the template, so no extra lookup is needed
+        if self.__is_vm_exist():
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error(_VM_ALREADY_EXIST, self.vm_name, self.get_failure_message(self.vm_name))
             raise VirtualMachineAlreadyExist(msg="VM: {0} already exist".format(self.vm_name))
-        clone_vm_task_obj = self.template_obj.Clone(name=self.vm_name, folder=self.folder_obj, spec=clone_spec)
-        self.logger.info('{0} - Cloning task created'.format(self.vm_name))
+        clone_vm_task_obj = self.template_obj.Clone(name=self.vm_name, folder=self.folder_obj,
+                                                    spec=self.__get_clone_spec())
+        self.logger.info('%s - Cloning task created', self.vm_name)
         self.vm_obj = self.task_progress(clone_vm_task_obj, self.vm_name)
+        self._vm_obj_stale = self.vm_obj is None
+        self.invalidate_cache([vim.VirtualMachine])
+        self.__invalidate_device_cache()
         if not self.vm_obj:
-            self.logger.error(
-                '{0} - Failed to clone VM {1} from template {2}'.format(self.vm_name,
-                                                                        self.get_failure_message(self.vm_name),
-                                                                        template_name))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Failed to clone VM %s from template %s',
+                                  self.vm_name, self.get_failure_message(self.vm_name), template_name)
             raise VirtualMachineCloningFailure(msg="Failed to Clone VM ({0}) from template ({1})".format(self.vm_name,
                                                                                                          template_name))
 
-    def create(self, memory_in_MB=4096, num_of_CPUs=1, guest_OS_id='otherGuest64', version='vmx-08'):
+    @classmethod
+    def check_create_values(cls, memory_in_MB, num_of_CPUs, guest_OS_id=None, version=None):
         """
-        Main method to create Virtual Machine
+        To validate hardware values of a new virtual machine against vSphere limits, without any round trip
         Args:
-            memory_in_MB:                    (int): Memory in Megabytes; default: 4096
-            num_of_CPUs:                     (int): Number of CPUs; default: 1
-            guest_OS_id:                     (str): Guest OS ID; default: otherGuest64
-            version:                         (str): Virtual Machine version; default: vmx-08
+            memory_in_MB:                    (int): Memory in Megabytes
+            num_of_CPUs:                     (int): Number of CPUs
+            guest_OS_id:                     (str): Guest OS ID; default: None
+            version:                         (str): Virtual Machine version; default: None
+        Return:
+            (tuple):                         Memory in Megabytes and number of CPUs
+        Raise:
+            TypeError if memory or number of CPUs isn't an integer, or guest OS ID or version isn't a string
+            VirtualMachineCreationFailure if memory or number of CPUs is out of vSphere limits
+        """
+        # Unlike int(), floats and strings are rejected instead of truncated; bool is an int too, but never a size
+        for name, value in (('memory', memory_in_MB), ('number of CPUs', num_of_CPUs)):
+            if isinstance(value, bool) or not hasattr(type(value), '__index__'):
+                raise TypeError("{0} must be an integer, not {1!r}".format(name, value))
+        memory_mb = operator.index(memory_in_MB)
+        num_cpus = operator.index(num_of_CPUs)
+        for name, value in (('guest OS ID', guest_OS_id), ('version', version)):
+            if value is not None and not isinstance(value, str):
+                raise TypeError("{0} must be a string, not {1!r}".format(name, value))
+        if not 1 <= num_cpus <= cls.MAX_NUM_CPUS:
+            raise VirtualMachineCreationFailure(msg="Number of CPUs ({0}) must be between 1 and {1}".format(
+                num_cpus, cls.MAX_NUM_CPUS))
+        if memory_mb < cls.MEMORY_MB_GRANULARITY or memory_mb % cls.MEMORY_MB_GRANULARITY:
+            raise VirtualMachineCreationFailure(msg="Memory ({0} MB) must be a positive multiple of {1} MB".format(
+                memory_mb, cls.MEMORY_MB_GRANULARITY))
+        return memory_mb, num_cpus
+
+    def __submit_create(self, memory_in_MB, num_of_CPUs, guest_OS_id, version):
         """
+        To validate arguments and submit the create task of the virtual machine, without waiting for it
+        Args:
+            memory_in_MB:                    (int): Memory in Megabytes
+            num_of_CPUs:                     (int): Number of CPUs
+            guest_OS_id:                     (str): Guest OS ID
+            version:                         (str): Virtual Machine version
+        Return:
+            (obj):                           Create task object
+        Raise:
+            TypeError if memory or number of CPUs isn't an integer, or guest OS ID or version isn't a string
+            VirtualMachineCreationFailure if memory or number of CPUs is out of vSphere limits
+        """
+        # Validated before any round trip
+        try:
+            self.memory_mb, self.num_cpus = self.check_create_values(memory_in_MB, num_of_CPUs, guest_OS_id, version)
+        except VirtualMachineCreationFailure as exception:
+            self.logger.error('%s - %s', self.vm_name, exception)
+            raise
         self.set_vm_obj()
         if self.vm_obj:
-            self.logger.error(
-                '{0} - Virtual Machine ({1}) already exist'.format(self.vm_name,
-                                                                   self.get_failure_message(self.vm_name)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error(_VM_ALREADY_EXIST, self.vm_name, self.get_failure_message(self.vm_name))
             raise VirtualMachineAlreadyExist(msg="VM: {0} already exist".format(self.vm_name))
-        datastore_path = "[{0}] {1}/{1}.vmx".format(self.datastore_obj.name, self.vm_name)
-        vmx_file = vim.vm.FileInfo(logDirectory=None,
-                                   snapshotDirectory=None,
-                                   suspendDirectory=None,
-                                   vmPathName=datastore_path)
-        config = vim.vm.ConfigSpec(
-            name=self.vm_name,
-            annotation="Virtual Machine for Continuous Integration",
-            memoryMB=int(memory_in_MB),
-            numCPUs=int(num_of_CPUs),
-            files=vmx_file,
-            guestId=guest_OS_id,
-            version=version
-        )
-        create_vm_task = self.folder_obj.CreateVM_Task(config=config, pool=self.resource_pool_obj)
+        self.__prefetch_object_names()
+        vmx_file = _build_vmx_file(self.__get_datastore_name(), self.vm_name)
+        config = copy.copy(_CONFIG_SPEC_TEMPLATE)
+        for field_name, field_type in _CONFIG_SPEC_LIST_FIELDS:
+            setattr(config, field_name, field_type())
+        config.name = self.vm_name
+        config.memoryMB = self.memory_mb
+        config.numCPUs = self.num_cpus
+        config.files = vmx_file
+        # None is passed through, leaving the field unset as before
+        config.guestId = sys.intern(guest_OS_id) if guest_OS_id else guest_OS_id
+        config.version = sys.intern(version) if version else version
+        return self.folder_obj.CreateVM_Task(config=config, pool=self.resource_pool_obj)
+
+    def __finish_create(self, create_vm_task):
+        """
+        To wait for the create task of the virtual machine and set vm_obj
+        Args:
+            create_vm_task:                  (obj): Create task object
+        """
         self.vm_obj = self.task_progress(create_vm_task, self.vm_name)
+        self._vm_obj_stale = self.vm_obj is None
+        self.invalidate_cache([vim.VirtualMachine])
+        self.__invalidate_device_cache()
         if not self.vm_obj:
-            self.logger.error(
-                '{0} - Failed to create VM {1}'.format(self.vm_name, self.get_failure_message(self.vm_name)))
+            if self.logger.isEnabledFor(logging.ERROR):
+                self.logger.error('%s - Failed to create VM %s', self.vm_name, self.get_failure_message(self.vm_name))
             raise VirtualMachineCreationFailure(msg="Failed to create VM ({0})".format(self.vm_name))
 
+    def create(self, memory_in_MB=4096, num_of_CPUs=1, guest_OS_id='otherGuest64', version='vmx-08'):
+        """
+        Main method to create Virtual Machine
+        Args:
+            memory_in_MB:                    (int): Memory in Megabytes; default: 4096
+            num_of_CPUs:                     (int): Number of CPUs; default: 1
+            guest_OS_id:                     (str): Guest OS ID; default: otherGuest64
+            version:                         (str): Virtual Machine version; default: vmx-08
+        Raise:
+            TypeError if memory or number of CPUs isn't an integer
+            VirtualMachineCreationFailure if memory or number of CPUs is out of vSphere limits, or creation failed
+        """
+        self.__finish_create(self.__submit_create(memory_in_MB, num_of_CPUs, guest_OS_id, version))
+
+    @classmethod
+    def create_many(cls, virtual_machines, memory_in_MB=4096, num_of_CPUs=1, guest_OS_id='otherGuest64',
+                    version='vmx-08', max_inflight=64):
+        """
+        Main method to create several Virtual Machines with the same configuration
+        Create tasks of a window of virtual machines are submitted from several threads, so the server runs them
+        at once, then all of them are waited for before the next window is submitted
+        Args:
+            virtual_machines:                (list): VirtualMachine objects with datastore, resource pool and folder set
+            memory_in_MB:                    (int): Memory in Megabytes; default: 4096
+            num_of_CPUs:                     (int): Number of CPUs; default: 1
+            guest_OS_id:                     (str): Guest OS ID; default: otherGuest64
+            version:                         (str): Virtual Machine version; default: vmx-08
+            max_inflight:                    (int): Maximum create tasks running at once; default: 64
+        Raise:
+            Exception:                       First exception of a virtual machine, after all of them have finished
+        """
+        virtual_machines = list(virtual_machines)
+        failure = None
+        for window_start in range(0, len(virtual_machines), max_inflight):
+            window = virtual_machines[window_start:window_start + max_inflight]
+            # Indexed afresh once per window, instead of by every submitting thread missing a stale index
+            window[0].invalidate_cache([vim.VirtualMachine])
+            window[0].index_objects([vim.VirtualMachine])
+            # Concurrent submissions are bounded by kept-alive connections of the session
+            with ThreadPoolExecutor(max_workers=min(len(window), cls.CONNECTION_POOL_SIZE)) as executor:
+                futures = [(virtual_machine, executor.submit(virtual_machine.__submit_create, memory_in_MB,
+                                                             num_of_CPUs, guest_OS_id, version))
+                           for virtual_machine in window]
+            submitted = []
+            for virtual_machine, future in futures:
+                try:
+                    submitted.append((virtual_machine, future.result()))
+                except Exception as exception:
+                    failure = failure or exception
+            for virtual_machine, create_vm_task in submitted:
+                try:
+                    virtual_machine.__finish_create(create_vm_task)
+                except Exception as exception:
+                    failure = failure or exception
+        if failure:
+            raise failure
+
+    def __setattr__(self, name, value):
+        """
+        To set an attribute, dropping the cached information of __call__ and __str__ it is part of
+        Args:
+            name:               (str): Attribute name
+            value:              (obj): Attribute value
+        """
+        super().__setattr__(name, value)
+        # Private attributes are left out of __call__ information
+        if not name.startswith('_'):
+            super().__setattr__('_cached_view', None)
+            if name in ('host', 'port'):
+                super().__setattr__('_str_cache', None)
+
     def __call__(self):
         """
-        Will return dictionary of current object's information
+        Will return read-only dictionary of current object's public information
+        Private attributes and managed object references are left out
+        It is built once and reused until a public attribute is set
+        Return:
+            (MappingProxyType):  Virtual Machines information in Dictionary
+        """
+        if self._cached_view is None:
+            information = ((name, getattr(self, name)) for name in ESXHost.__slots__ + VirtualMachine.__slots__
+                           if not name.startswith('_'))
+            self._cached_view = MappingProxyType(dict(
+                (name, value) for name, value in information if not isinstance(value, vim.ManagedObject)))
+        return self._cached_view
+
+    def __reduce__(self):
+        """
+        To pickle the object by names only, as managed objects and the session can't be pickled
+        The password is left out, so it is unpickled only where a connection to the same host is already pooled
+        Return:
+            (tuple):             Restore function and its arguments
+        """
+        return (_restore_virtual_machine, (
+            self.host, self.username, self.port, self.logger, self.ssl_check, self.vm_name,
+            self._object_names.get(self.datacenter_obj), self._object_names.get(self.datastore_obj),
+            self._object_names.get(self.resource_pool_obj), self._object_names.get(self.folder_obj),
+            self.memory_mb, self.num_cpus))
+
+    def get_info(self):
+        """
+        Will return serializable information of current object
+        Names of objects which haven't been retrieved yet are None, so no round trip is made
         Return:
-            (dict):              Virtual Machines information in Dictionary
+            (VMInfo):            Virtual Machine information
         """
-        return self.__dict__
+        return VMInfo(host=self.host, port=self.port, username=self.username, vm_name=self.vm_name,
+                      vm_id=self.vm_obj._moId if self.vm_obj else None,
+                      datacenter=self._object_names.get(self.datacenter_obj),
+                      datastore=self._object_names.get(self.datastore_obj),
+                      resource_pool=self._object_names.get(self.resource_pool_obj),
+                      folder=self._object_names.get(self.folder_obj),
+                      memory_mb=self.memory_mb, num_cpus=self.num_cpus)
 
     def __str__(self):
         """
@@ -653,4 +1155,79 @@ class VirtualMachine(ESXHost):
         Return:
             (str):              Will return connection information
         """
-        return "Connected to {0}:{1}".format(self.host, self.port)
+        if self._str_cache is None:
+            self._str_cache = "Connected to {0}:{1}".format(self.host, self.port)
+        return self._str_cache
+
+
+def _restore_virtual_machine(host, username, port, logger, ssl_check, vm_name, datacenter, datastore, resource_pool,
+                             folder_name, memory_mb, num_cpus):
+    """
+    To unpickle a virtual machine object, finding its objects again by name
+    Datacenter and folder are set like create does, falling back to the defaults when their names are unknown.
+    Datastore and resource pool are set only if they were found by name, the virtual machine object is looked up
+    on first use
+    Args:
+        host:               (str): ESX(Vmware VSphere) hostname
+        username:           (str): username to authenticate into host
+        port:               (int): port number for connection
+        logger:             (obj): Logger object to manage logging
+        ssl_check:          (bool): False to disable SSL Check and True to enable it
+        vm_name:            (str): Virtual machine name
+        datacenter:         (str): Datacenter Name or None
+        datastore:          (str): Datastore Name or None
+        resource_pool:      (str): Resource Pool Name or None
+        folder_name:        (str): Folder Name or None
+        memory_mb:          (int): Memory in Megabytes or None
+        num_cpus:           (int): Number of CPUs or None
+    Return:
+        (VirtualMachine):   Virtual machine object sharing the pooled connection to host
+    Raise:
+        FailedToConnect if no connection to host with username is pooled
+    """
+    if (host, port, username) not in ESXHost.connection_pool:
+        raise FailedToConnect(msg="No pooled connection to {0}:{1} using username ({2}) to unpickle VM ({3})"
+                              .format(host, port, username, vm_name))
+    virtual_machine = VirtualMachine(host=host, username=username, password=None, port=port, logger=logger,
+                                     ssl_check=ssl_check, vm_name=vm_name)
+    virtual_machine.set_datacenter_obj(datacenter)
+    if datastore:
+        virtual_machine.set_datastore_obj(datastore)
+    if resource_pool:
+        virtual_machine.set_resource_pool_obj(resource_pool)
+    virtual_machine.set_folder_obj(folder_name)
+    virtual_machine.memory_mb = memory_mb
+    virtual_machine.num_cpus = num_cpus
+    return virtual_machine
+
+
+class VirtualMachineBatch:
+    """
+    Virtual Machine Batch class to run the same operation on several virtual machines at once
+    Virtual machines of a batch can share one connection, as the session and task waiting are thread safe
+    """
+
+    def __init__(self, virtual_machines, max_workers=None):
+        """
+        Constructor for VirtualMachineBatch
+        Args:
+            virtual_machines:   (list): VirtualMachine objects
+            max_workers:        (int):  Maximum operations run at once, Default is None for as many as kept-alive
+                                        connections of a session
+        """
+        self.virtual_machines = list(virtual_machines)
+        self.max_workers = max_workers or ESXHost.CONNECTION_POOL_SIZE
+
+    def map(self, operation):
+        """
+        Run operation for every virtual machine of the batch and wait for all of them
+        Args:
+            operation:          (obj): Callable taking a VirtualMachine object
+        Return:
+            (list):             Result of every operation, in virtual machine order
+        Raise:
+            Exception:          First exception raised by an operation, after all operations have finished
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(operation, virtual_machine) for virtual_machine in self.virtual_machines]
+        return [future.result() for future in futures]